@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF内存处理接口
+功能：供Web服务等嵌入使用，输入为 bytes / memoryview / 二进制文件对象，输出为 bytes，
+      全程不经过文件系统，默认不打印任何信息
+依赖：pip install reportlab PyPDF2 (可选：pip install pikepdf)
+"""
+
+import io
+
+from pdf_backend import ON_ERROR_SKIP
+from pdf_shuiyin import PDFWatermarkTool
+from pdf_rotate import PDFRotateTool
+from pdf_delete import PDFDeleteTool
+
+
+def add_watermark_bytes(data, watermark_text, opacity=0.3, font_size=50,
+                        password=None, robust=False, on_error=ON_ERROR_SKIP,
+                        backend=None, log=None, progress=None):
+    """
+    为内存中的PDF添加水印
+
+    Args:
+        data (bytes | memoryview | file): 输入PDF
+        watermark_text (str): 水印文字
+        opacity (float): 透明度
+        font_size (int): 字体大小
+        password (str): 加密PDF的密码
+        robust (bool): 容错模式
+        on_error (str): 容错模式下单页出错的处理方式，"skip" 或 "passthrough"
+        backend (str): 处理后端名称
+        log (callable): 接收提示信息的回调
+        progress (callable): 每处理完一页调用 progress(页号, 总页数)
+
+    Returns:
+        tuple: (输出PDF的 bytes, 处理报告)
+    """
+    output = io.BytesIO()
+    tool = PDFWatermarkTool(backend, log=log, progress=progress)
+    report = tool.add_watermark_to_pdf(
+        data, output, watermark_text, opacity, font_size, password, robust, on_error
+    )
+    return output.getvalue(), report
+
+
+def rotate_pdf_bytes(data, rotation_angle, page_range=None,
+                     password=None, robust=False, on_error=ON_ERROR_SKIP,
+                     backend=None, log=None, progress=None,
+                     dedupe=False, remove_duplicates=False, remove_blank=False):
+    """
+    旋转内存中的PDF
+
+    Args:
+        data (bytes | memoryview | file): 输入PDF
+        rotation_angle (int): 旋转角度
+        page_range (str): 页面范围，如 "1-3" 或 "1,3,5" 或 "all"
+        dedupe (bool): 相同内容的流只保留一份，改为共享引用
+        remove_duplicates (bool): 删除完全重复的页面
+        remove_blank (bool): 删除空白页
+        其余参数同 add_watermark_bytes
+
+    Returns:
+        tuple: (输出PDF的 bytes, 处理报告)
+    """
+    output = io.BytesIO()
+    tool = PDFRotateTool(backend, log=log, progress=progress)
+    report = tool.rotate_pdf(
+        data, output, rotation_angle, page_range, password, robust, on_error,
+        dedupe, remove_duplicates, remove_blank
+    )
+    return output.getvalue(), report
+
+
+def delete_pages_bytes(data, pages_to_delete,
+                       password=None, robust=False, on_error=ON_ERROR_SKIP,
+                       backend=None, log=None, progress=None,
+                       dedupe=False, remove_duplicates=False, remove_blank=False):
+    """
+    从内存中的PDF删除页面
+
+    Args:
+        data (bytes | memoryview | file): 输入PDF
+        pages_to_delete (set): 要删除的页面号集合（从1开始）
+        dedupe、remove_duplicates、remove_blank 同 rotate_pdf_bytes
+        其余参数同 add_watermark_bytes
+
+    Returns:
+        tuple: (输出PDF的 bytes, 处理报告)
+
+    Raises:
+        ValueError: 要删除所有页面
+    """
+    output = io.BytesIO()
+    tool = PDFDeleteTool(backend, log=log, progress=progress)
+    report = tool.delete_pages_from_pdf(
+        data, output, pages_to_delete, password, robust, on_error,
+        dedupe, remove_duplicates, remove_blank
+    )
+    if report is False:
+        raise ValueError("不能删除所有页面")
+    return output.getvalue(), report
@@ -0,0 +1,780 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF处理后端
+功能：为三个工具提供统一的文档操作接口（打开、遍历页面、旋转、删除、叠加、保存），
+      默认使用 PyPDF2，可选使用基于 qpdf 的 pikepdf 加速
+依赖：pip install PyPDF2 (可选：pip install pikepdf)
+"""
+
+import io
+import os
+import sys
+
+import PyPDF2
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    StreamObject,
+)
+
+from pdf_dedup import PageDeduplicator
+from pdf_recovery import check_xref, rebuild_xref
+
+# 通过环境变量选择默认后端，例如 PDF_TOOLS_BACKEND=pikepdf
+BACKEND_ENV = "PDF_TOOLS_BACKEND"
+DEFAULT_BACKEND = "pypdf2"
+# 叠加层在页面资源中使用的 XObject 名称前缀
+OVERLAY_NAME_PREFIX = "PdfToolsOverlay"
+# 以此作为输入路径时从标准输入读取
+STDIN_PATH = "-"
+
+# 容错模式下单页失败时的处理方式
+ON_ERROR_SKIP = "skip"                  # 从输出中去掉该页
+ON_ERROR_PASSTHROUGH = "passthrough"    # 原样保留该页，不做处理
+ON_ERROR_CHOICES = (ON_ERROR_SKIP, ON_ERROR_PASSTHROUGH)
+# 文档目录中跨页引用页面的结构：大纲、命名目标、表单、标签结构树、页码标签
+DOCUMENT_STRUCTURE_KEYS = ("/Outlines", "/Dests", "/Names", "/AcroForm", "/StructTreeRoot",
+                           "/PageLabels")
+
+
+class PDFPasswordError(Exception):
+    """PDF已加密且未提供正确的密码"""
+
+
+def format_page_error(error):
+    """单页错误的说明文字，如 "第 3 页 (已跳过): KeyError: ..." """
+    action = "已跳过" if error["action"] == ON_ERROR_SKIP else "原样保留"
+    return f"第 {error['page']} 页 ({action}): {error['error']}"
+
+
+def log_page_errors(errors, log):
+    """
+    输出单页错误报告
+
+    Args:
+        errors (list): PDFDocument.errors
+        log (callable): 接收提示信息的回调
+    """
+    if errors:
+        log(f"\n⚠️ {len(errors)} 页处理失败：")
+        for error in errors:
+            log(f"  {format_page_error(error)}")
+
+
+def log_dedup_report(dedup, log):
+    """
+    输出页面去重报告
+
+    Args:
+        dedup (dict): PDFDocument.deduplicate 的返回值，未去重时为 None
+        log (callable): 接收提示信息的回调
+    """
+    if dedup:
+        log(f"♻️ 共享重复流 {dedup['shared_streams']} 个，"
+            f"预计节省 {dedup['bytes_saved'] / 1024:.1f} KB")
+        if dedup["duplicate_pages"]:
+            log(f"♻️ 删除重复页: {dedup['duplicate_pages']}")
+        if dedup["blank_pages"]:
+            log(f"♻️ 删除空白页: {dedup['blank_pages']}")
+
+
+def open_input(source):
+    """
+    把各种输入统一为可 seek 的二进制文件对象
+
+    Args:
+        source (str | bytes | memoryview | file): 文件路径、"-"（标准输入）、内存数据或二进制文件对象
+
+    Returns:
+        tuple: (文件对象, 是否需要由调用方关闭)
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), True
+    if hasattr(source, "read"):
+        seekable = getattr(source, "seekable", None)
+        if seekable and seekable():
+            return source, False
+        # 管道等不可 seek 的输入需要先读入内存
+        return io.BytesIO(source.read()), True
+    if source == STDIN_PATH:
+        return io.BytesIO(sys.stdin.buffer.read()), True
+    return open(source, 'rb'), True
+
+
+class PDFDocument:
+    """
+    后端无关的文档句柄
+
+    页面索引从0开始，始终指向原始文档中的页面；
+    delete_pages 只做标记，保存时才真正删除，因此删除后其余页面的索引不变。
+
+    容错模式 (robust) 下，打开时会检测并修复损坏的交叉引用表，
+    单页失败记录在 errors 中而不是中断整个文档。
+    """
+
+    def __init__(self, input_path, password=None, robust=False, on_error=ON_ERROR_SKIP):
+        if on_error not in ON_ERROR_CHOICES:
+            raise ValueError(f"未知的出错处理方式: {on_error}")
+        self.robust = robust
+        self.on_error = on_error
+        self.deleted = set()
+        self.errors = []        # [{"page": 页号, "error": 错误信息, "action": 处理方式}]
+        self.repaired = False   # 是否重建过交叉引用表
+        self._input = None      # 由文档负责关闭的输入文件
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.page_count
+
+    def __iter__(self):
+        """遍历未被删除的页面索引"""
+        for index in range(self.page_count):
+            if index not in self.deleted:
+                yield index
+
+    @property
+    def page_count(self):
+        raise NotImplementedError
+
+    def page_size(self, index):
+        """返回页面 (宽, 高)"""
+        raise NotImplementedError
+
+    def rotate_page(self, index, angle):
+        """在当前旋转角度的基础上顺时针旋转 angle 度"""
+        raise NotImplementedError
+
+    def overlay_page(self, index, overlay_bytes):
+        """把 overlay_bytes（单页PDF）的第一页叠加到页面上方"""
+        raise NotImplementedError
+
+    def delete_pages(self, indices):
+        """标记删除页面"""
+        self.deleted.update(indices)
+
+    def page_failed(self, index, error, action=None):
+        """
+        记录单页错误；非容错模式下直接抛出
+
+        Args:
+            index (int): 页面索引
+            error (Exception): 捕获到的异常
+            action (str): 处理方式，默认使用打开文档时指定的 on_error
+        """
+        if not self.robust:
+            raise error
+        action = action or self.on_error
+        self.errors.append({
+            "page": index + 1,
+            "error": f"{type(error).__name__}: {error}",
+            "action": action,
+        })
+        if action == ON_ERROR_SKIP:
+            self.deleted.add(index)
+
+    def deduplicate(self, remove_duplicates=False, remove_blank=False):
+        """
+        页面去重：字节完全相同的流（内容流、图片、字体等）只保留一份，改为共享引用
+
+        Args:
+            remove_duplicates (bool): 删除与前面某页完全相同的页面
+            remove_blank (bool): 删除不含任何绘制操作的空白页
+
+        Returns:
+            dict: 去重报告，包括共享的重复流个数、删除的重复页和空白页页号、预计节省的字节数
+        """
+        deduplicator = PageDeduplicator(self)
+        pages = list(self)
+        bytes_before = deduplicator.stream_bytes(pages)
+        seen = set()
+        duplicate_pages = []
+        blank_pages = []
+
+        for index in pages:
+            try:
+                fingerprint = deduplicator.page_fingerprint(index)
+                if remove_blank and deduplicator.is_blank(index):
+                    blank_pages.append(index)
+                elif remove_duplicates and fingerprint in seen:
+                    duplicate_pages.append(index)
+                seen.add(fingerprint)
+            except Exception as e:
+                # 去重失败的页面原样保留
+                self.page_failed(index, e, ON_ERROR_PASSTHROUGH)
+
+        removed = set(duplicate_pages + blank_pages)
+        if pages and removed >= set(pages):
+            # 不删除全部页面，至少保留第一页
+            removed.discard(pages[0])
+            blank_pages = [index for index in blank_pages if index != pages[0]]
+        self.deleted.update(removed)
+
+        bytes_after = deduplicator.stream_bytes([index for index in pages if index not in removed])
+        return {
+            "shared_streams": len(deduplicator.shared_streams),
+            "duplicate_pages": [index + 1 for index in duplicate_pages],
+            "blank_pages": [index + 1 for index in blank_pages],
+            "bytes_saved": bytes_before - bytes_after,
+        }
+
+    def has_document_structure(self):
+        """
+        文档是否包含引用其他页面的结构（大纲、命名目标、表单等，或任意页面上的批注）
+
+        这些结构在按页面范围拆分后无法还原，批处理时此类文档整份处理。
+        无法读取的页面同样按有结构处理。
+        """
+        _, entries = self._children(self._resolve(self._root_object()))
+        if any(str(key) in DOCUMENT_STRUCTURE_KEYS for key, _ in entries):
+            return True
+        for index in range(self.page_count):
+            try:
+                _, entries = self._children(self._resolve(self._page_object(index)))
+            except Exception:
+                return True
+            if any(str(key) == "/Annots" for key, _ in entries):
+                return True
+        return False
+
+    def save(self, output_file):
+        """把结果写入已打开的二进制文件对象"""
+        raise NotImplementedError
+
+    # 以下为 PageDeduplicator 和 has_document_structure 使用的底层对象访问接口
+
+    def _root_object(self):
+        """文档目录 (/Root) 字典"""
+        raise NotImplementedError
+
+    def _page_object(self, index):
+        """页面字典"""
+        raise NotImplementedError
+
+    def _object_id(self, obj):
+        """间接引用返回 (对象号, 代数)，直接对象返回 None"""
+        raise NotImplementedError
+
+    def _resolve(self, obj):
+        """解析间接引用"""
+        raise NotImplementedError
+
+    def _raw_stream(self, obj):
+        """流对象未解码的原始数据"""
+        raise NotImplementedError
+
+    def _children(self, obj):
+        """返回 (类型, [(键, 值), ...])，类型为 "dict"、"array" 或 "stream"；标量返回 None"""
+        raise NotImplementedError
+
+    def _replace(self, container, key, value):
+        """把字典或数组中的一项替换为 value"""
+        container[key] = value
+
+    def _content_data(self, index):
+        """解码后的页面内容流"""
+        raise NotImplementedError
+
+    def close(self):
+        if self._input is not None:
+            self._input.close()
+            self._input = None
+
+    def _read_input(self, input_path):
+        """
+        打开输入，容错模式下检测并修复交叉引用表
+
+        Returns:
+            file: 指向文件开头的可 seek 二进制文件对象
+        """
+        stream, owned = open_input(input_path)
+        self._input = stream if owned else None
+        if self.robust and not check_xref(stream):
+            stream.seek(0)
+            repaired = io.BytesIO(rebuild_xref(stream.read()))
+            if owned:
+                stream.close()
+            stream = self._input = repaired
+            self.repaired = True
+        stream.seek(0)
+        return stream
+
+
+def _copy_annotations(pdf_writer, reader, written, page_failed=None):
+    """
+    为已复制到 pdf_writer 的页面补上批注
+
+    批注中的链接指向其他页面，随页面一起复制会沿链接逐页递归（长链接链会超出递归深度），
+    因此先用 add_page(..., excluded_keys=("/Annots",)) 复制全部页面，再调用本函数：
+    此时链接目标已在输出中；指向未写出页面（已删除或跳过）的链接改为指向空对象，
+    避免把这些页面连同其链接再复制一遍。
+
+    Args:
+        pdf_writer (PdfWriter): 输出
+        reader (PdfReader): 页面来源
+        written (list): [(来源页面索引, 输出页面)]
+        page_failed (callable): 单页批注复制失败时调用 page_failed(索引, 异常)，为空时直接抛出
+    """
+    translated = pdf_writer._id_translated.setdefault(id(reader), {})
+    dropped = None
+    for source in reader.pages:
+        reference = source.indirect_reference
+        if reference is not None and reference.idnum not in translated:
+            if dropped is None:
+                dropped = pdf_writer._add_object(NullObject())
+            translated[reference.idnum] = dropped.idnum
+    for index, page in written:
+        source = reader.pages[index]
+        if NameObject("/Annots") not in source:
+            continue
+        try:
+            page[NameObject("/Annots")] = source.raw_get(NameObject("/Annots")).clone(pdf_writer)
+        except Exception as e:
+            if page_failed is None:
+                raise
+            page_failed(index, e)
+
+
+def _copy_info(pdf_writer, reader):
+    """把文档信息字典（标题、作者等）复制到输出，损坏的文档信息不影响页面输出"""
+    try:
+        info = reader.trailer.get("/Info")
+        if info is None:
+            return
+        info = info.get_object()
+        pdf_writer.get_object(pdf_writer._info).update({
+            NameObject(key): info.raw_get(key).get_object().clone(pdf_writer)
+            for key in info.keys()
+        })
+    except Exception:
+        pass
+
+
+class PyPDF2Document(PDFDocument):
+    def __init__(self, input_path, password=None, robust=False, on_error=ON_ERROR_SKIP):
+        super().__init__(input_path, password, robust, on_error)
+        self._overlays = {}
+        try:
+            self._reader = PyPDF2.PdfReader(self._read_input(input_path), strict=False)
+            if self._reader.is_encrypted and not self._reader.decrypt(password or ""):
+                raise PDFPasswordError("PDF已加密，密码错误或未提供密码")
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def page_count(self):
+        return len(self._reader.pages)
+
+    def page_size(self, index):
+        mediabox = self._reader.pages[index].mediabox
+        return float(mediabox.width), float(mediabox.height)
+
+    def rotate_page(self, index, angle):
+        self._reader.pages[index].rotate(angle)
+
+    def overlay_page(self, index, overlay_bytes):
+        # 叠加在保存时进行，见 _apply_overlay
+        self._overlays.setdefault(index, []).append(overlay_bytes)
+
+    def save(self, output_file):
+        pdf_writer = PyPDF2.PdfWriter()
+        overlay_cache = {}
+        written = []
+        for index in list(self):
+            # 批注在全部页面复制完成后再补上，见 _copy_annotations
+            try:
+                page = pdf_writer.add_page(self._reader.pages[index], excluded_keys=("/Annots",))
+            except Exception as e:
+                self.page_failed(index, e, ON_ERROR_SKIP)
+                continue
+            written.append((index, page))
+            for overlay_bytes in self._overlays.get(index, ()):
+                try:
+                    self._apply_overlay(pdf_writer, page, overlay_bytes, overlay_cache)
+                except Exception as e:
+                    # 页面已写入输出，叠加失败时只能原样保留
+                    self.page_failed(index, e, ON_ERROR_PASSTHROUGH)
+        _copy_annotations(pdf_writer, self._reader, written,
+                          lambda index, e: self.page_failed(index, e, ON_ERROR_PASSTHROUGH))
+        _copy_info(pdf_writer, self._reader)
+        pdf_writer.write(output_file)
+
+    def _overlay_form(self, pdf_writer, overlay_bytes, overlay_cache):
+        """把叠加页转换为 Form XObject，相同的叠加内容只写入一次"""
+        if overlay_bytes in overlay_cache:
+            return overlay_cache[overlay_bytes]
+
+        overlay_page = PyPDF2.PdfReader(io.BytesIO(overlay_bytes)).pages[0]
+        contents = overlay_page[NameObject("/Contents")].get_object()
+        if isinstance(contents, StreamObject):
+            # 直接复制已压缩的内容流，无需解码
+            form = contents.clone(pdf_writer)
+        else:
+            form = DecodedStreamObject()
+            form.set_data(overlay_page.get_contents().get_data())
+        form[NameObject("/Type")] = NameObject("/XObject")
+        form[NameObject("/Subtype")] = NameObject("/Form")
+        form[NameObject("/BBox")] = overlay_page.mediabox.clone(pdf_writer)
+        form[NameObject("/Resources")] = overlay_page[NameObject("/Resources")].clone(pdf_writer)
+        overlay_cache[overlay_bytes] = pdf_writer._add_object(form)
+        return overlay_cache[overlay_bytes]
+
+    def _content_stream(self, pdf_writer, data, overlay_cache):
+        """登记一段很短的内容流，相同内容的页面共享同一个对象"""
+        key = ("stream", data)
+        if key not in overlay_cache:
+            stream = DecodedStreamObject()
+            stream.set_data(data)
+            overlay_cache[key] = pdf_writer._add_object(stream)
+        return overlay_cache[key]
+
+    def _apply_overlay(self, pdf_writer, page, overlay_bytes, overlay_cache):
+        """
+        快速叠加：只在页面资源中登记 Form XObject，并在内容数组首尾追加 q / Q ... Do 引用。
+
+        与 merge_page 不同，原页面的内容流字节保持原样，不会被解码、重命名或重新编码，
+        因此耗时与原页面内容的复杂度无关。
+        """
+        form_ref = self._overlay_form(pdf_writer, overlay_bytes, overlay_cache)
+
+        if NameObject("/Resources") in page:
+            resources = page[NameObject("/Resources")].get_object()
+        else:
+            resources = DictionaryObject()
+            page[NameObject("/Resources")] = resources
+        if NameObject("/XObject") in resources:
+            xobjects = resources[NameObject("/XObject")].get_object()
+        else:
+            xobjects = DictionaryObject()
+            resources[NameObject("/XObject")] = xobjects
+
+        # 已有同名资源（例如对带水印的文件再次加水印）时换用下一个名称
+        number = 0
+        while True:
+            name = NameObject(f"/{OVERLAY_NAME_PREFIX}{number}")
+            existing = xobjects.raw_get(name) if name in xobjects else None
+            if existing is None or (isinstance(existing, IndirectObject)
+                                    and existing.idnum == form_ref.idnum):
+                break
+            number += 1
+        xobjects[name] = form_ref
+
+        contents = []
+        if NameObject("/Contents") in page:
+            raw_contents = page.raw_get(NameObject("/Contents"))
+            target = raw_contents.get_object() if isinstance(raw_contents, IndirectObject) else raw_contents
+            if isinstance(target, ArrayObject):
+                contents = list(target)
+            else:
+                contents = [raw_contents]
+        page[NameObject("/Contents")] = ArrayObject([
+            self._content_stream(pdf_writer, b"q\n", overlay_cache),
+            *contents,
+            self._content_stream(pdf_writer, f"\nQ\nq {name} Do Q\n".encode(), overlay_cache),
+        ])
+
+    # 去重时直接改写读入的对象：add_page 按对象号复制，共享同一引用的流只会写出一次
+
+    def _root_object(self):
+        return self._reader.trailer.raw_get("/Root")
+
+    def _page_object(self, index):
+        return self._reader.pages[index]
+
+    def _object_id(self, obj):
+        if isinstance(obj, IndirectObject):
+            return obj.idnum, obj.generation
+        return None
+
+    def _resolve(self, obj):
+        return obj.get_object()
+
+    def _raw_stream(self, obj):
+        return obj._data
+
+    def _children(self, obj):
+        if isinstance(obj, StreamObject):
+            return "stream", [(key, obj.raw_get(key)) for key in obj.keys()]
+        if isinstance(obj, DictionaryObject):
+            return "dict", [(key, obj.raw_get(key)) for key in obj.keys()]
+        if isinstance(obj, ArrayObject):
+            return "array", list(enumerate(obj))
+        return None
+
+    def _content_data(self, index):
+        contents = self._reader.pages[index].get(NameObject("/Contents"))
+        if contents is None:
+            return b""
+        contents = contents.get_object()
+        if isinstance(contents, ArrayObject):
+            return b"\n".join(item.get_object().get_data() for item in contents)
+        return contents.get_data()
+
+
+
+def _save_pikepdf(pdf, output_file):
+    """
+    保存 pikepdf 文档
+
+    qpdf 默认会解码并重新压缩所有流，这里关闭解码和压缩，已有的流按原始字节写出。
+    qpdf 只接受可 seek 的标准流对象，管道等输出先在内存中生成再整体写出。
+    """
+    import pikepdf
+    options = {"stream_decode_level": pikepdf.StreamDecodeLevel.none, "compress_streams": False}
+    if isinstance(output_file, io.IOBase) and output_file.seekable():
+        pdf.save(output_file, **options)
+        return
+    buffer = io.BytesIO()
+    pdf.save(buffer, **options)
+    output_file.write(buffer.getbuffer())
+
+
+class PikepdfDocument(PDFDocument):
+    def __init__(self, input_path, password=None, robust=False, on_error=ON_ERROR_SKIP):
+        super().__init__(input_path, password, robust, on_error)
+        import pikepdf
+        self._pikepdf = pikepdf
+        self._pdf = None
+        # 叠加用的水印文档需在保存前保持打开
+        self._overlays = []
+        self._forms = {}
+        self._streams = {}
+        try:
+            if isinstance(input_path, str) and input_path != STDIN_PATH and not robust:
+                # 普通文件直接交给 qpdf 读取，速度最快
+                source = input_path
+            else:
+                # qpdf 自带的修复在 xref 条目"看似合法"时不会触发，容错模式统一使用线性扫描重建
+                source = self._read_input(input_path)
+            self._pdf = pikepdf.open(source, password=password or "")
+        except pikepdf.PasswordError:
+            self.close()
+            raise PDFPasswordError("PDF已加密，密码错误或未提供密码")
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def page_count(self):
+        return len(self._pdf.pages)
+
+    def page_size(self, index):
+        x0, y0, x1, y1 = (float(value) for value in self._pdf.pages[index].mediabox)
+        return abs(x1 - x0), abs(y1 - y0)
+
+    def rotate_page(self, index, angle):
+        self._pdf.pages[index].rotate(angle, relative=True)
+
+    def overlay_page(self, index, overlay_bytes):
+        """
+        与 PyPDF2 后端相同的快速叠加路径。
+
+        不使用 Page.add_overlay，因为它最后会调用 contents_coalesce，
+        把原页面的全部内容流解码后重新拼接。
+        """
+        pikepdf = self._pikepdf
+        form = self._forms.get(overlay_bytes)
+        if form is None:
+            overlay_pdf = pikepdf.open(io.BytesIO(overlay_bytes))
+            self._overlays.append(overlay_pdf)
+            form = self._pdf.copy_foreign(overlay_pdf.pages[0].as_form_xobject())
+            self._forms[overlay_bytes] = form
+
+        page = self._pdf.pages[index]
+        if pikepdf.Name.XObject not in page.resources:
+            page.resources[pikepdf.Name.XObject] = pikepdf.Dictionary()
+        xobjects = page.resources[pikepdf.Name.XObject]
+
+        # 已有同名资源（例如对带水印的文件再次加水印）时换用下一个名称
+        number = 0
+        while True:
+            name = pikepdf.Name(f"/{OVERLAY_NAME_PREFIX}{number}")
+            if name not in xobjects or (xobjects[name].is_indirect
+                                        and xobjects[name].objgen == form.objgen):
+                break
+            number += 1
+        xobjects[name] = form
+
+        page.contents_add(self._content_stream(b"q\n"), prepend=True)
+        page.contents_add(self._content_stream(f"\nQ\nq {name} Do Q\n".encode()), prepend=False)
+
+    def _content_stream(self, data):
+        """相同内容的页面共享同一个内容流对象"""
+        if data not in self._streams:
+            self._streams[data] = self._pdf.make_indirect(self._pikepdf.Stream(self._pdf, data))
+        return self._streams[data]
+
+    def save(self, output_file):
+        for index in sorted(self.deleted, reverse=True):
+            del self._pdf.pages[index]
+        self.deleted.clear()
+        _save_pikepdf(self._pdf, output_file)
+
+    # qpdf 只写出可达的对象，去重后不再被引用的重复流不会出现在输出中
+
+    def _root_object(self):
+        return self._pdf.Root
+
+    def _page_object(self, index):
+        return self._pdf.pages[index].obj
+
+    def _object_id(self, obj):
+        if isinstance(obj, self._pikepdf.Object) and obj.is_indirect:
+            return obj.objgen
+        return None
+
+    def _resolve(self, obj):
+        return obj
+
+    def _raw_stream(self, obj):
+        return obj.read_raw_bytes()
+
+    def _children(self, obj):
+        pikepdf = self._pikepdf
+        if isinstance(obj, pikepdf.Stream):
+            return "stream", list(obj.stream_dict.items())
+        if isinstance(obj, pikepdf.Dictionary):
+            return "dict", list(obj.items())
+        if isinstance(obj, pikepdf.Array):
+            return "array", list(enumerate(obj))
+        return None
+
+    def _content_data(self, index):
+        contents = self._pdf.pages[index].obj.get("/Contents")
+        if contents is None:
+            return b""
+        if isinstance(contents, self._pikepdf.Array):
+            return b"\n".join(item.read_bytes() for item in contents)
+        return contents.read_bytes()
+
+    def close(self):
+        for overlay_pdf in self._overlays:
+            overlay_pdf.close()
+        if self._pdf is not None:
+            self._pdf.close()
+        super().close()
+
+
+class PDFBackend:
+    name = ""
+    document_class = PDFDocument
+
+    def open(self, input_path, password=None, robust=False, on_error=ON_ERROR_SKIP):
+        """
+        打开PDF并返回 PDFDocument
+
+        Args:
+            input_path (str | bytes | memoryview | file): 输入PDF路径、"-"（标准输入）、内存数据或文件对象
+            password (str): 加密文档的密码
+            robust (bool): 容错模式，修复损坏的交叉引用表并跳过出错的页面
+            on_error (str): 容错模式下单页出错时的处理方式，skip 或 passthrough
+        """
+        return self.document_class(input_path, password, robust, on_error)
+
+    def merge(self, input_paths, output_file):
+        """
+        按顺序合并多个PDF的全部页面，文档信息取自第一个输入
+
+        Args:
+            input_paths (list): 输入PDF路径
+            output_file (file): 已打开的二进制输出文件对象
+        """
+        raise NotImplementedError
+
+
+class PyPDF2Backend(PDFBackend):
+    """纯Python实现，兼容性最好"""
+    name = "pypdf2"
+    document_class = PyPDF2Document
+
+    def merge(self, input_paths, output_file):
+        pdf_writer = PyPDF2.PdfWriter()
+        handles = []
+        try:
+            for input_path in input_paths:
+                file = open(input_path, 'rb')
+                handles.append(file)
+                pdf_reader = PyPDF2.PdfReader(file)
+                if len(handles) == 1:
+                    _copy_info(pdf_writer, pdf_reader)
+                written = [(index, pdf_writer.add_page(page, excluded_keys=("/Annots",)))
+                           for index, page in enumerate(pdf_reader.pages)]
+                _copy_annotations(pdf_writer, pdf_reader, written)
+            pdf_writer.write(output_file)
+        finally:
+            for file in handles:
+                file.close()
+
+
+class PikepdfBackend(PDFBackend):
+    """基于 qpdf 的编译实现，处理大文件更快"""
+    name = "pikepdf"
+    document_class = PikepdfDocument
+
+    def __init__(self):
+        try:
+            import pikepdf  # noqa: F401
+        except ImportError:
+            raise ImportError("pikepdf 后端不可用，请运行：pip install pikepdf")
+
+    def merge(self, input_paths, output_file):
+        import pikepdf
+        # 被复制页面的源文档需在保存前保持打开
+        sources = []
+        try:
+            # 以第一个输入为基础追加其余页面，保留其文档信息和文档目录
+            with pikepdf.open(input_paths[0]) as merged:
+                for input_path in input_paths[1:]:
+                    source = pikepdf.open(input_path)
+                    sources.append(source)
+                    merged.pages.extend(source.pages)
+                _save_pikepdf(merged, output_file)
+        finally:
+            for source in sources:
+                source.close()
+
+
+BACKENDS = {
+    PyPDF2Backend.name: PyPDF2Backend,
+    PikepdfBackend.name: PikepdfBackend,
+}
+
+
+def get_backend(backend=None):
+    """
+    获取处理后端
+
+    Args:
+        backend (str | PDFBackend): 后端名称或实例，为空时读取环境变量 PDF_TOOLS_BACKEND
+
+    Returns:
+        PDFBackend: 后端实例
+    """
+    if isinstance(backend, PDFBackend):
+        return backend
+
+    name = (backend or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"未知的PDF后端: {name}，可选: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def add_backend_arguments(parser):
+    """为命令行添加后端、密码和容错相关参数"""
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="PDF处理后端，默认读取环境变量 PDF_TOOLS_BACKEND")
+    parser.add_argument("--password", default=None, help="加密PDF的密码")
+    parser.add_argument("--robust", action="store_true",
+                        help="容错模式：修复损坏的交叉引用表，单页出错时不中断整个文件")
+    parser.add_argument("--on-error", choices=ON_ERROR_CHOICES, default=ON_ERROR_SKIP,
+                        help="容错模式下单页出错的处理方式：跳过该页或原样保留")
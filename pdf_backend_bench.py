@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF后端一致性检查与性能对比
+功能：用每个可用后端分别执行水印、旋转、删除，检查输出是否等价、
+      原页面内容流是否按原始字节写出，并比较耗时
+依赖：pip install reportlab PyPDF2 pikepdf
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+import PyPDF2
+from reportlab.pdfgen import canvas
+
+from pdf_backend import BACKENDS, get_backend
+from pdf_shuiyin import PDFWatermarkTool
+from pdf_rotate import PDFRotateTool
+from pdf_delete import PDFDeleteTool
+
+WATERMARK_TEXT = "BENCH"
+ROTATE_PAGES = "1-3,5"
+DELETE_PAGES = {2, 4}
+
+
+def make_sample_pdf(path, pages):
+    """生成带文字和图形的测试PDF"""
+    can = canvas.Canvas(path)
+    for page_num in range(1, pages + 1):
+        can.drawString(72, 720, f"sample page {page_num}")
+        for row in range(40):
+            can.line(72, 100 + row * 12, 540, 110 + row * 12)
+        can.showPage()
+    can.save()
+
+
+def run_operations(backend_name, input_path, work_dir):
+    """
+    用指定后端执行三种操作
+
+    Returns:
+        dict: {操作名: (输出路径, 耗时秒数)}
+    """
+    results = {}
+    operations = {
+        "watermark": lambda out: PDFWatermarkTool(backend_name).add_watermark_to_pdf(
+            input_path, out, WATERMARK_TEXT, 0.3, 30),
+        "rotate": lambda out: PDFRotateTool(backend_name).rotate_pdf(
+            input_path, out, 90, ROTATE_PAGES),
+        "delete": lambda out: PDFDeleteTool(backend_name).delete_pages_from_pdf(
+            input_path, out, DELETE_PAGES),
+    }
+    for name, operation in operations.items():
+        output_path = os.path.join(work_dir, f"{backend_name}_{name}.pdf")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            operation(output_path)
+        results[name] = (output_path, time.perf_counter() - start)
+    return results
+
+
+def describe_pdf(path):
+    """提取用于比较的页面特征：旋转角度、页面尺寸、文字内容"""
+    pages = []
+    with open(path, 'rb') as file:
+        for page in PyPDF2.PdfReader(file).pages:
+            pages.append((
+                int(page.get('/Rotate', 0)) % 360,
+                tuple(round(float(value), 2) for value in page.mediabox),
+                " ".join(page.extract_text().split()),
+            ))
+    return pages
+
+
+def raw_contents(path):
+    """提取每页内容流未解码的原始数据"""
+    pages = []
+    with open(path, 'rb') as file:
+        for page in PyPDF2.PdfReader(file).pages:
+            contents = page.get('/Contents')
+            contents = contents.get_object() if contents is not None else []
+            if not isinstance(contents, list):
+                contents = [contents]
+            pages.append([item.get_object()._data for item in contents])
+    return pages
+
+
+def missing_raw_pages(input_path, output_path, deleted=()):
+    """
+    检查输出中是否仍包含原页面内容流的原始字节（没有被解码后重新压缩）
+
+    Returns:
+        list: 原始字节不在输出中的页号
+    """
+    with open(output_path, 'rb') as file:
+        output = file.read()
+    return [page_num for page_num, streams in enumerate(raw_contents(input_path), 1)
+            if page_num not in deleted and not all(data in output for data in streams)]
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="PDF后端一致性检查与性能对比")
+    parser.add_argument("input", nargs="?", help="输入PDF，缺省时自动生成测试文件")
+    parser.add_argument("--pages", type=int, default=50, help="自动生成的测试文件页数")
+    args = parser.parse_args()
+
+    backends = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            backends.append(name)
+        except ImportError as e:
+            print(f"⚠️ 跳过后端 {name}: {e}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = args.input
+        if not input_path:
+            input_path = os.path.join(work_dir, "sample.pdf")
+            make_sample_pdf(input_path, max(5, args.pages))
+
+        results = {name: run_operations(name, input_path, work_dir) for name in backends}
+
+        print("=" * 60)
+        print(f"{'操作':<12}" + "".join(f"{name:>14}" for name in backends))
+        for operation in ("watermark", "rotate", "delete"):
+            timings = "".join(f"{results[name][operation][1]:>13.3f}s" for name in backends)
+            print(f"{operation:<12}{timings}")
+        print("=" * 60)
+
+        reference = backends[0]
+        consistent = True
+        for name in backends[1:]:
+            for operation in ("watermark", "rotate", "delete"):
+                expected = describe_pdf(results[reference][operation][0])
+                actual = describe_pdf(results[name][operation][0])
+                if expected == actual:
+                    print(f"✅ {name} {operation} 与 {reference} 输出一致")
+                else:
+                    consistent = False
+                    print(f"❌ {name} {operation} 与 {reference} 输出不一致")
+
+        for name in backends:
+            for operation in ("watermark", "rotate", "delete"):
+                deleted = DELETE_PAGES if operation == "delete" else ()
+                missing = missing_raw_pages(input_path, results[name][operation][0], deleted)
+                if missing:
+                    consistent = False
+                    print(f"❌ {name} {operation} 重新编码了原页面内容流: 第 {missing[:10]} 页")
+                else:
+                    print(f"✅ {name} {operation} 原页面内容流按原始字节写出")
+
+    if not consistent:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
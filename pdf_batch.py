@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF批量处理调度器
+功能：按页数和文件大小对批量任务进行"最长优先"调度，
+      将超大文档拆分为页面范围子任务，并在并发进程间限制总内存占用
+依赖：pip install reportlab PyPDF2 (可选：pip install pikepdf)
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from pdf_backend import ON_ERROR_SKIP, add_backend_arguments, format_page_error, get_backend
+from pdf_dedup import add_dedup_arguments
+from pdf_output import DEFAULT_BUFFER_SIZE, open_output
+from pdf_shuiyin import PDFWatermarkTool
+from pdf_rotate import PDFRotateTool
+from pdf_delete import PDFDeleteTool
+
+# 单个子任务的默认最大页数，超过该页数的文档会被拆分
+DEFAULT_SPLIT_PAGES = 500
+# 默认全局内存预算 (MB)
+DEFAULT_MEMORY_BUDGET_MB = 2048
+# 内存估算：PyPDF2 解析后的对象约为文件字节数的数倍，另加每页固定开销
+MEMORY_FACTOR = 4
+PAGE_OVERHEAD_BYTES = 64 * 1024
+# 代价估算中，多少字节折合为一页的处理量
+BYTES_PER_PAGE_COST = 64 * 1024
+
+TOOL_NAMES = ("watermark", "rotate", "delete")
+
+
+class BatchJob:
+    """调度单元：整个文档、文档的一个页面范围，或子任务合并"""
+
+    def __init__(self, kind, tool, input_path, output_path, options,
+                 page_start=1, page_end=None, total_pages=0, size_bytes=0):
+        self.kind = kind                    # "file" / "part" / "merge"
+        self.tool = tool
+        self.input_path = input_path
+        self.output_path = output_path
+        self.options = options
+        self.page_start = page_start
+        self.page_end = page_end if page_end is not None else total_pages
+        self.total_pages = total_pages
+        self.size_bytes = size_bytes
+        self.parts = []                     # merge 任务的输入子文件（按页序）
+        self.part_dir = None                # merge 任务的临时目录
+        self.merge = None                   # part 任务所属的合并任务
+
+    @property
+    def page_count(self):
+        return max(0, self.page_end - self.page_start + 1)
+
+    @property
+    def share_bytes(self):
+        """该任务涉及的字节数（按页数比例分摊）"""
+        if not self.total_pages:
+            return self.size_bytes
+        return self.size_bytes * self.page_count // self.total_pages
+
+    @property
+    def cost(self):
+        """预估处理代价，用于最长优先排序"""
+        return self.page_count + self.share_bytes / BYTES_PER_PAGE_COST
+
+    @property
+    def memory(self):
+        """预估峰值内存 (字节)"""
+        if self.kind == "part":
+            # 子任务仍需解析整个文档的交叉引用表和页面树
+            return (self.share_bytes * MEMORY_FACTOR
+                    + self.size_bytes
+                    + self.page_count * PAGE_OVERHEAD_BYTES)
+        return self.size_bytes * MEMORY_FACTOR + self.page_count * PAGE_OVERHEAD_BYTES
+
+
+def _open_options(options):
+    """打开文档时使用的密码和容错参数"""
+    return (options.get("password"), options.get("robust", False),
+            options.get("on_error", ON_ERROR_SKIP))
+
+
+def _dedup_options(options):
+    """页面去重参数，仅 rotate / delete 使用"""
+    return (options.get("dedupe", False), options.get("remove_duplicates", False),
+            options.get("remove_blank", False))
+
+
+def _run_tool(tool, input_path, output_path, options):
+    """
+    在工作进程中调用对应工具的处理函数
+
+    Returns:
+        dict: 工具返回的处理报告
+    """
+    # 多个工作进程同时打印会相互交错，子任务中的页号也不是原文档页号，
+    # 因此不输出逐页信息，统一由调度器汇总报告
+    tool_args = (options.get("backend"), options.get("buffer_size", DEFAULT_BUFFER_SIZE),
+                 options.get("fsync", False), None)
+    if tool == "watermark":
+        return PDFWatermarkTool(*tool_args).add_watermark_to_pdf(
+            input_path, output_path, options["text"],
+            options.get("opacity", 0.3), options.get("font_size", 50),
+            *_open_options(options)
+        )
+    elif tool == "rotate":
+        return PDFRotateTool(*tool_args).rotate_pdf(
+            input_path, output_path, options["angle"], options.get("page_range"),
+            *_open_options(options), *_dedup_options(options)
+        )
+    elif tool == "delete":
+        return PDFDeleteTool(*tool_args).delete_pages_from_pdf(
+            input_path, output_path, options["pages_to_delete"],
+            *_open_options(options), *_dedup_options(options)
+        )
+    else:
+        raise ValueError(f"未知工具: {tool}")
+
+
+def _local_options(job, kept_pages):
+    """
+    将整文档的页面参数换算为子任务内的页号
+
+    Args:
+        job (BatchJob): 子任务
+        kept_pages (list): 子文件中各页对应的原文档页号
+    """
+    options = dict(job.options)
+    local = {page_num: position for position, page_num in enumerate(kept_pages, 1)}
+    if job.tool == "rotate":
+        pages = {local[p] for p in options["pages"] if p in local}
+        options["page_range"] = ",".join(map(str, sorted(pages)))
+    elif job.tool == "delete":
+        options["pages_to_delete"] = {local[p] for p in options["pages_to_delete"] if p in local}
+    # 子文件已解密、已修复
+    options["password"] = None
+    return options
+
+
+def _extract_pages(input_path, output_path, page_start, page_end, options):
+    """
+    把页面范围提取为独立的临时PDF
+
+    Returns:
+        tuple: (子文件中各页对应的原文档页号, 提取时的单页错误)
+    """
+    backend = get_backend(options.get("backend"))
+    password, robust, _ = _open_options(options)
+    with backend.open(input_path, password, robust, ON_ERROR_SKIP) as document:
+        document.delete_pages(index for index in range(document.page_count)
+                              if not page_start - 1 <= index < page_end)
+        # pikepdf 保存时会真正删除页面并重新编号，需在保存前记录原页号；
+        # PyPDF2 保存时跳过的出错页面再从中去掉
+        kept_pages = [index + 1 for index in document]
+        with open_output(output_path) as output_file:
+            document.save(output_file)
+        skipped = {error["page"] for error in document.errors if error["action"] == ON_ERROR_SKIP}
+        return [page_num for page_num in kept_pages if page_num not in skipped], document.errors
+
+
+def _merge_parts(parts, output_path, options):
+    """按顺序合并子任务输出，使用与处理时相同的后端"""
+    backend = get_backend(options.get("backend"))
+    with open_output(output_path) as output_file:
+        backend.merge(parts, output_file)
+
+
+def run_job(job):
+    """
+    工作进程入口
+
+    Returns:
+        tuple: (进程号, 开始时间, 结束时间, 输出文件或None, 单页错误列表, 去重节省的字节数)
+    """
+    start = time.time()
+    output = job.output_path
+    errors = []
+    bytes_saved = 0
+
+    if job.kind == "file":
+        report = _run_tool(job.tool, job.input_path, job.output_path, job.options)
+        if report:
+            errors = report["errors"]
+            if report.get("dedup"):
+                bytes_saved = report["dedup"]["bytes_saved"]
+    elif job.kind == "part":
+        range_pages = set(range(job.page_start, job.page_end + 1))
+        if job.tool == "rotate" and not range_pages & job.options["pages"]:
+            # 本范围内无需旋转，直接提取原页面
+            _, errors = _extract_pages(job.input_path, job.output_path,
+                                       job.page_start, job.page_end, job.options)
+        elif job.tool == "delete" and range_pages <= job.options["pages_to_delete"]:
+            # 本范围内的页面全部删除，不产生输出
+            output = None
+        else:
+            part_input = job.output_path + ".in.pdf"
+            try:
+                kept_pages, errors = _extract_pages(job.input_path, part_input,
+                                                    job.page_start, job.page_end, job.options)
+                options = _local_options(job, kept_pages)
+                if job.tool == "delete" and len(options["pages_to_delete"]) >= len(kept_pages):
+                    output = None
+                elif job.tool == "rotate" and not options["page_range"]:
+                    # 要旋转的页面在提取时都被跳过，空范围会被当作"全部"，直接使用提取出的原页面
+                    os.replace(part_input, job.output_path)
+                else:
+                    report = _run_tool(job.tool, part_input, job.output_path, options)
+                    # 子文件内的页号换算回原文档页号
+                    for error in report["errors"]:
+                        errors.append(dict(error, page=kept_pages[error["page"] - 1]))
+            finally:
+                if os.path.exists(part_input):
+                    os.remove(part_input)
+    elif job.kind == "merge":
+        _merge_parts(job.parts, job.output_path, job.options)
+    else:
+        raise ValueError(f"未知任务类型: {job.kind}")
+
+    return os.getpid(), start, time.time(), output, errors, bytes_saved
+
+
+class PDFBatchScheduler:
+    def __init__(self, workers=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                 split_pages=DEFAULT_SPLIT_PAGES):
+        """
+        初始化批量调度器
+
+        Args:
+            workers (int): 并发进程数，默认为CPU核数
+            memory_budget_mb (int): 所有并发任务的预估内存总上限 (MB)
+            split_pages (int): 超过该页数的文档拆分为子任务
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.split_pages = max(1, split_pages)
+
+    def plan(self, tool, input_paths, output_paths, options):
+        """
+        为每个文件生成任务
+
+        Args:
+            tool (str): watermark / rotate / delete
+            input_paths (list): 输入PDF路径
+            output_paths (list): 对应的输出路径
+            options (dict): 工具参数；watermark 需要 text，rotate 需要 angle，rotate/delete 使用 page_range
+
+        Returns:
+            tuple: (可立即执行的任务列表, {合并任务: 未完成子任务数}, {无法处理的文件: 原因})
+        """
+        jobs = []
+        merges = {}
+        failed = {}
+
+        for input_path, output_path in zip(input_paths, output_paths):
+            try:
+                size_bytes = os.path.getsize(input_path)
+                with get_backend(options.get("backend")).open(
+                        input_path, *_open_options(options)) as document:
+                    total_pages = document.page_count
+                    structured = (total_pages > self.split_pages
+                                  and document.has_document_structure())
+            except Exception as e:
+                failed[input_path] = f"{type(e).__name__}: {e}"
+                print(f"❌ 无法读取: {input_path}: {e}")
+                continue
+
+            file_options = dict(options)
+            if tool == "rotate":
+                file_options["pages"] = PDFRotateTool().parse_page_range(
+                    options.get("page_range"), total_pages)
+            elif tool == "delete":
+                file_options["pages_to_delete"] = PDFDeleteTool().parse_page_range(
+                    options.get("page_range"), total_pages)
+                if len(file_options["pages_to_delete"]) >= total_pages:
+                    failed[input_path] = "不能删除所有页面"
+                    print(f"❌ 不能删除所有页面: {input_path}")
+                    continue
+
+            # 重复页可能分布在不同的子任务中，去重时整份处理；
+            # 大纲、链接等跨页结构拆分后无法还原，同样整份处理
+            dedup = tool != "watermark" and any(_dedup_options(file_options))
+            if total_pages <= self.split_pages or dedup or structured:
+                jobs.append(BatchJob("file", tool, input_path, output_path, file_options,
+                                     total_pages=total_pages, size_bytes=size_bytes))
+                continue
+
+            part_dir = tempfile.mkdtemp(prefix=".pdf_batch_",
+                                        dir=os.path.dirname(os.path.abspath(output_path)))
+            merge = BatchJob("merge", tool, input_path, output_path, file_options,
+                             total_pages=total_pages, size_bytes=size_bytes)
+            merge.part_dir = part_dir
+            part_jobs = []
+            for page_start in range(1, total_pages + 1, self.split_pages):
+                page_end = min(page_start + self.split_pages - 1, total_pages)
+                part = BatchJob("part", tool, input_path,
+                                os.path.join(part_dir, f"{page_start:08d}.pdf"), file_options,
+                                page_start, page_end, total_pages, size_bytes)
+                part.merge = merge
+                part_jobs.append(part)
+            merges[merge] = len(part_jobs)
+            jobs.extend(part_jobs)
+
+        return jobs, merges, failed
+
+    def _pick(self, pending, memory_in_use, running):
+        """选择能放入内存预算的最大任务；无任务运行时总是放行最大任务"""
+        for index, job in enumerate(pending):
+            if not running or memory_in_use + job.memory <= self.memory_budget:
+                return pending.pop(index)
+        return None
+
+    def run(self, tool, input_paths, output_paths, options):
+        """
+        执行批量任务
+
+        Returns:
+            dict: 调度统计，包括总耗时和每个工作进程的利用率
+        """
+        pending, merges, failed = self.plan(tool, input_paths, output_paths, options)
+        pending.sort(key=lambda job: job.cost, reverse=True)
+
+        print(f"共 {len(input_paths)} 个文件，{len(pending)} 个任务，"
+              f"{self.workers} 个进程，内存预算 {self.memory_budget // (1024 * 1024)} MB")
+
+        busy = {}
+        errors = {}
+        bytes_saved = 0
+        running = {}
+        memory_in_use = 0
+        started = time.time()
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                while pending or running:
+                    while len(running) < self.workers:
+                        job = self._pick(pending, memory_in_use, running)
+                        if job is None:
+                            break
+                        running[executor.submit(run_job, job)] = job
+                        memory_in_use += job.memory
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        memory_in_use -= job.memory
+                        try:
+                            pid, start, end, output, page_errors, saved = future.result()
+                        except Exception as e:
+                            # 单个文件失败不影响其他文件
+                            failed[job.input_path] = f"{type(e).__name__}: {e}"
+                            output, page_errors = None, []
+                            print(f"❌ 失败: {job.input_path}: {e}")
+                        else:
+                            busy[pid] = busy.get(pid, 0.0) + (end - start)
+                            bytes_saved += saved
+                        if page_errors:
+                            errors.setdefault(job.input_path, []).extend(page_errors)
+
+                        if job.kind == "part":
+                            merge = job.merge
+                            if output:
+                                merge.parts.append(output)
+                            merges[merge] -= 1
+                            if merges[merge] == 0 and merge.input_path not in failed:
+                                merge.parts.sort()
+                                pending.append(merge)
+                                pending.sort(key=lambda item: item.cost, reverse=True)
+                        elif job.kind == "merge":
+                            shutil.rmtree(job.part_dir, ignore_errors=True)
+                        if job.kind != "part" and job.input_path not in failed:
+                            print(f"✅ 完成: {job.output_path}")
+        finally:
+            for merge in merges:
+                shutil.rmtree(merge.part_dir, ignore_errors=True)
+
+        makespan = time.time() - started
+        utilization = {pid: (seconds / makespan if makespan else 0.0)
+                       for pid, seconds in busy.items()}
+        return {
+            "makespan": makespan,
+            "busy": busy,
+            "utilization": utilization,
+            "errors": errors,
+            "failed": failed,
+            "bytes_saved": bytes_saved,
+        }
+
+    def print_report(self, stats):
+        """打印每个工作进程的利用率"""
+        print("\n📊 调度统计：")
+        print(f"总耗时: {stats['makespan']:.2f} 秒")
+        for pid, ratio in sorted(stats["utilization"].items()):
+            print(f"进程 {pid}: 忙碌 {stats['busy'][pid]:.2f} 秒，利用率 {ratio:.0%}")
+        if stats["utilization"]:
+            average = sum(stats["utilization"].values()) / self.workers
+            print(f"平均利用率: {average:.0%}")
+        if stats.get("bytes_saved"):
+            print(f"页面去重预计节省: {stats['bytes_saved'] / (1024 * 1024):.2f} MB")
+        for input_path, page_errors in sorted(stats["errors"].items()):
+            print(f"\n⚠️ {input_path}: {len(page_errors)} 页处理失败")
+            for error in sorted(page_errors, key=lambda item: item["page"]):
+                print(f"  {format_page_error(error)}")
+        for input_path, message in sorted(stats["failed"].items()):
+            print(f"\n❌ {input_path}: {message}")
+
+
+def default_output_path(tool, input_path, options):
+    """生成与各工具交互模式一致的输出文件名"""
+    base_name = os.path.splitext(input_path)[0]
+    if tool == "watermark":
+        return f"{base_name}_watermarked.pdf"
+    if tool == "rotate":
+        return f"{base_name}_rotated_{options['angle']}deg.pdf"
+    return f"{base_name}_batch_deleted.pdf"
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="PDF批量处理调度器")
+    parser.add_argument("tool", choices=TOOL_NAMES, help="处理工具")
+    parser.add_argument("inputs", nargs="+", help="PDF文件或目录")
+    parser.add_argument("--text", help="水印内容 (watermark)")
+    parser.add_argument("--opacity", type=float, default=0.3, help="水印透明度 (watermark)")
+    parser.add_argument("--font-size", type=int, default=50, help="字体大小 (watermark)")
+    parser.add_argument("--angle", type=int, default=90, help="旋转角度 (rotate)")
+    parser.add_argument("--pages", default=None,
+                        help="页面范围，如 1,3-5 (rotate 默认全部；delete 必填)")
+    add_backend_arguments(parser)
+    add_dedup_arguments(parser)
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE // 1024,
+                        help="输出文件写缓冲区大小 (KB)")
+    parser.add_argument("--fsync", action="store_true", help="替换目标文件前 fsync，确保落盘")
+    parser.add_argument("--workers", type=int, default=None, help="并发进程数")
+    parser.add_argument("--memory-budget", type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help="全局内存预算 (MB)")
+    parser.add_argument("--split-pages", type=int, default=DEFAULT_SPLIT_PAGES,
+                        help="超过该页数的文档拆分为子任务")
+    args = parser.parse_args()
+
+    if args.tool == "watermark" and not args.text:
+        parser.error("watermark 需要 --text")
+    if args.tool == "delete" and not args.pages:
+        parser.error("delete 需要 --pages")
+
+    input_paths = []
+    for item in args.inputs:
+        if os.path.isdir(item):
+            input_paths.extend(sorted(
+                os.path.join(item, name) for name in os.listdir(item)
+                if name.lower().endswith('.pdf')
+            ))
+        elif os.path.exists(item) and item.lower().endswith('.pdf'):
+            input_paths.append(item)
+        else:
+            print(f"⚠️ 跳过非PDF文件: {item}")
+    if not input_paths:
+        print("❌ 没有找到PDF文件！")
+        sys.exit(1)
+
+    options = {
+        "text": args.text,
+        "opacity": max(0.1, min(1.0, args.opacity)),
+        "font_size": max(20, min(100, args.font_size)),
+        "angle": args.angle % 360,
+        "page_range": args.pages,
+        "backend": args.backend,
+        "password": args.password,
+        "robust": args.robust,
+        "on_error": args.on_error,
+        "buffer_size": max(1, args.buffer_size) * 1024,
+        "fsync": args.fsync,
+        "dedupe": args.dedupe,
+        "remove_duplicates": args.remove_duplicates,
+        "remove_blank": args.remove_blank,
+    }
+    output_paths = [default_output_path(args.tool, path, options) for path in input_paths]
+
+    scheduler = PDFBatchScheduler(args.workers, args.memory_budget, args.split_pages)
+    try:
+        stats = scheduler.run(args.tool, input_paths, output_paths, options)
+    except Exception as e:
+        print(f"❌ 批量处理失败：{e}")
+        sys.exit(1)
+
+    scheduler.print_report(stats)
+    if stats["failed"]:
+        print("\n❌ 部分文件处理失败！")
+        sys.exit(1)
+    print("\n🎉 任务完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+损坏PDF回归样本集
+功能：生成一组加密、交叉引用表损坏、页面损坏、长链接链以及含重复页和空白页的PDF，
+      并用每个后端在容错模式下跑三个工具，确认不会整份失败；
+      长链接链还会按批处理的方式拆分后再合并
+依赖：pip install reportlab PyPDF2 (可选：pip install pikepdf)
+"""
+
+import io
+import os
+import re
+import sys
+import argparse
+import tempfile
+import contextlib
+
+import PyPDF2
+from PyPDF2.generic import ArrayObject, DictionaryObject, NameObject, NumberObject
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from pdf_backend import BACKENDS, ON_ERROR_SKIP, PDFPasswordError, format_page_error, get_backend
+from pdf_batch import _extract_pages, _merge_parts
+from pdf_shuiyin import PDFWatermarkTool
+from pdf_rotate import PDFRotateTool
+from pdf_delete import PDFDeleteTool
+
+SAMPLE_PAGES = 6
+PASSWORD = "secret"
+BAD_PAGE = 4
+# 每页链接到下一页的长链，去重遍历不能沿链接递归
+LINKED_PAGES = 400
+# 去重样本：首页、封面、图片页、空白页、封面副本、图片页副本，每页单独生成后再拼接，
+# 副本与原页面字节相同但是不同的对象。共享的流为封面内容流、图片页内容流和图片
+DEDUP_EXPECTED = {"shared_streams": 3, "duplicate_pages": [5, 6], "blank_pages": [4]}
+
+
+def _sample_bytes(pages=SAMPLE_PAGES):
+    """生成正常的测试PDF"""
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet)
+    for page_num in range(1, pages + 1):
+        can.drawString(72, 720, f"corpus page {page_num}")
+        can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+def _single_page(draw):
+    """生成只有一页的PDF，draw(canvas) 绘制页面内容"""
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet, invariant=1)
+    draw(can)
+    can.showPage()
+    can.save()
+    return packet.getvalue()
+
+
+def _draw_cover(can):
+    can.setFont("Helvetica-Bold", 28)
+    can.drawString(72, 600, "corpus cover")
+
+
+def _draw_image(can):
+    image = Image.new("RGB", (64, 64))
+    image.putdata([(x * 4, y * 4, (x + y) * 2) for y in range(64) for x in range(64)])
+    can.drawImage(ImageReader(image), 72, 400, 256, 256)
+    can.drawString(72, 380, "corpus image")
+
+
+def _dedup_bytes():
+    """把分别生成的单页拼接成去重样本，相同的页面不共享任何对象"""
+    pdf_writer = PyPDF2.PdfWriter()
+    # PyPDF2 按 id(reader) 记录已复制的对象，读取器需保持存活，否则 id 复用会把不同页面的对象混在一起
+    readers = []
+    for draw in (lambda can: can.drawString(72, 720, "corpus page 1"),
+                 _draw_cover, _draw_image, lambda can: None, _draw_cover, _draw_image):
+        readers.append(PyPDF2.PdfReader(io.BytesIO(_single_page(draw))))
+        pdf_writer.add_page(readers[-1].pages[0])
+    packet = io.BytesIO()
+    pdf_writer.write(packet)
+    return packet.getvalue()
+
+
+def _rewrite(data, callback):
+    """用 PyPDF2 读入后修改再写出"""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+    pdf_writer = PyPDF2.PdfWriter()
+    for page in pdf_reader.pages:
+        pdf_writer.add_page(page)
+    callback(pdf_writer)
+    packet = io.BytesIO()
+    pdf_writer.write(packet)
+    return packet.getvalue()
+
+
+def _break_page(pdf_writer):
+    page = pdf_writer.pages[BAD_PAGE - 1]
+    page[NameObject("/MediaBox")] = ArrayObject([NumberObject(0), NumberObject(0)])
+    page[NameObject("/Rotate")] = NameObject("/Broken")
+    page[NameObject("/Resources")] = NumberObject(0)
+
+
+def _link_pages(pdf_writer):
+    pages = pdf_writer.pages
+    for page, target in zip(pages, pages[1:]):
+        link = DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Link"),
+            NameObject("/Rect"): ArrayObject([NumberObject(value) for value in (72, 700, 200, 730)]),
+            NameObject("/Dest"): ArrayObject([target.indirect_reference, NameObject("/Fit")]),
+        })
+        page[NameObject("/Annots")] = ArrayObject([pdf_writer._add_object(link)])
+
+
+def build_corpus(corpus_dir):
+    """
+    生成回归样本
+
+    Returns:
+        dict: {文件名: 期望}，期望包括密码、是否需要修复、哪些后端应报告单页错误
+    """
+    data = _sample_bytes()
+    startxref = data.rindex(b"startxref")
+    xref = data.rindex(b"\nxref") + 1
+    samples = {}
+
+    # startxref 指向错误的位置
+    samples["bad_startxref.pdf"] = (
+        data[:startxref] + re.sub(rb"startxref\s+\d+", b"startxref\n17", data[startxref:]),
+        {"repaired": True},
+    )
+    # xref 表条目被覆盖为乱码（长度不变）
+    entries = data.index(b"\n", data.index(b"\n", xref) + 1) + 1
+    garbage = re.sub(rb"\d", b"9", data[entries + 20:entries + 120])
+    samples["garbage_xref.pdf"] = (
+        data[:entries + 20] + garbage + data[entries + 120:],
+        {"repaired": True},
+    )
+    # 文件在 xref 表之前被截断
+    samples["truncated.pdf"] = (data[:xref], {"repaired": True})
+    # 加密文件
+    samples["encrypted.pdf"] = (
+        _rewrite(data, lambda pdf_writer: pdf_writer.encrypt(PASSWORD)),
+        {"password": PASSWORD},
+    )
+    # 某一页的 MediaBox 不完整，Rotate、Resources 类型错误
+    # qpdf 读入时会把这些字段纠正为默认值，因此只要求 PyPDF2 后端报告单页错误
+    samples["bad_page.pdf"] = (_rewrite(data, _break_page), {"page_errors": ("pypdf2",)})
+    # 每页都有指向下一页的链接注释，旋转和删除时开启页面去重，不应出现任何单页错误
+    samples["linked_pages.pdf"] = (
+        _rewrite(_sample_bytes(LINKED_PAGES), _link_pages),
+        {"dedupe": True},
+    )
+    # 重复的封面、图片页和一个空白页，旋转和删除时删除重复页和空白页
+    samples["duplicates.pdf"] = (_dedup_bytes(), {"dedup": DEDUP_EXPECTED})
+
+    expectations = {}
+    for name, (content, expected) in samples.items():
+        with open(os.path.join(corpus_dir, name), 'wb') as file:
+            file.write(content)
+        expectations[name] = expected
+    return expectations
+
+
+def run_tool(tool, backend, input_path, output_path, password, dedupe=False,
+             remove_duplicates=False, remove_blank=False):
+    """在容错模式下运行一个工具，返回处理报告"""
+    dedup_options = {"dedupe": dedupe, "remove_duplicates": remove_duplicates,
+                     "remove_blank": remove_blank}
+    with contextlib.redirect_stdout(io.StringIO()):
+        if tool == "watermark":
+            return PDFWatermarkTool(backend).add_watermark_to_pdf(
+                input_path, output_path, "CORPUS", 0.3, 30, password, True)
+        if tool == "rotate":
+            return PDFRotateTool(backend).rotate_pdf(
+                input_path, output_path, 90, "all", password, True, **dedup_options)
+        return PDFDeleteTool(backend).delete_pages_from_pdf(
+            input_path, output_path, {1}, password, True, **dedup_options)
+
+
+def check_sample(tool, backend, input_path, output_path, expected):
+    """
+    检查单个样本
+
+    Returns:
+        str: 失败原因，通过时返回空字符串
+    """
+    password = expected.get("password")
+    if password:
+        try:
+            run_tool(tool, backend, input_path, output_path, None)
+            return "未提供密码时没有报错"
+        except PDFPasswordError:
+            pass
+
+    dedup = expected.get("dedup")
+    try:
+        report = run_tool(tool, backend, input_path, output_path, password,
+                          expected.get("dedupe", False) or bool(dedup), bool(dedup), bool(dedup))
+    except Exception as e:
+        return f"容错模式下整份失败: {type(e).__name__}: {e}"
+
+    if expected.get("repaired") and not report["repaired"]:
+        return "没有检测到交叉引用表损坏"
+    if (backend in expected.get("page_errors", ()) and tool == "watermark"
+            and not report["errors"]):
+        return "没有报告损坏的页面"
+    if (expected.get("dedupe") or dedup) and report["errors"]:
+        return f"页面去重出错: {format_page_error(report['errors'][0])}"
+
+    removed = 0
+    if dedup and tool != "watermark":
+        actual = {key: report["dedup"][key] for key in dedup}
+        if actual != dedup:
+            return f"去重结果 {actual}，期望 {dedup}"
+        removed = len(dedup["duplicate_pages"]) + len(dedup["blank_pages"])
+
+    skipped = sum(1 for error in report["errors"] if error["action"] == ON_ERROR_SKIP)
+    expected_pages = report["total_pages"] - skipped - removed - (1 if tool == "delete" else 0)
+    with open(output_path, 'rb') as file:
+        actual_pages = len(PyPDF2.PdfReader(file).pages)
+    if actual_pages != expected_pages:
+        return f"输出页数 {actual_pages}，期望 {expected_pages}"
+    return ""
+
+
+def check_split(backend, input_path, work_dir):
+    """
+    按批处理的方式把长链接链拆成两半后再合并，合并时不能沿链接递归
+
+    Returns:
+        str: 失败原因，通过时返回空字符串
+    """
+    options = {"backend": backend}
+    middle = LINKED_PAGES // 2
+    parts = [os.path.join(work_dir, f"split_{backend}_{index}.pdf") for index in range(2)]
+    output_path = os.path.join(work_dir, f"split_{backend}.pdf")
+    try:
+        _extract_pages(input_path, parts[0], 1, middle, options)
+        _extract_pages(input_path, parts[1], middle + 1, LINKED_PAGES, options)
+        _merge_parts(parts, output_path, options)
+    except Exception as e:
+        return f"拆分合并失败: {type(e).__name__}: {e}"
+
+    with open(output_path, 'rb') as file:
+        pages = PyPDF2.PdfReader(file).pages
+        if len(pages) != LINKED_PAGES:
+            return f"输出页数 {len(pages)}，期望 {LINKED_PAGES}"
+        page_ids = [page.indirect_reference.idnum for page in pages]
+        for index, page in enumerate(pages[:-1]):
+            if index == middle - 1:
+                # 跨子文件的链接目标不在同一个子文件中
+                continue
+            annots = page.get("/Annots")
+            target = annots[0].get_object()["/Dest"][0] if annots else None
+            if getattr(target, "idnum", None) != page_ids[index + 1]:
+                return f"第 {index + 1} 页的链接没有指向下一页"
+    return ""
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="损坏PDF回归样本集")
+    parser.add_argument("--keep", metavar="DIR", help="把生成的样本保存到指定目录")
+    args = parser.parse_args()
+
+    backends = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+            backends.append(name)
+        except ImportError as e:
+            print(f"⚠️ 跳过后端 {name}: {e}")
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        corpus_dir = args.keep or work_dir
+        os.makedirs(corpus_dir, exist_ok=True)
+        expectations = build_corpus(corpus_dir)
+
+        for name, expected in expectations.items():
+            for backend in backends:
+                for tool in ("watermark", "rotate", "delete"):
+                    input_path = os.path.join(corpus_dir, name)
+                    output_path = os.path.join(work_dir, f"out_{backend}_{tool}_{name}")
+                    reason = check_sample(tool, backend, input_path, output_path, expected)
+                    if reason:
+                        failures += 1
+                        print(f"❌ {name} [{backend} {tool}]: {reason}")
+                    else:
+                        print(f"✅ {name} [{backend} {tool}]")
+
+        for backend in backends:
+            reason = check_split(backend, os.path.join(corpus_dir, "linked_pages.pdf"), work_dir)
+            if reason:
+                failures += 1
+                print(f"❌ linked_pages.pdf [{backend} split]: {reason}")
+            else:
+                print(f"✅ linked_pages.pdf [{backend} split]")
+
+    if failures:
+        print(f"\n❌ {failures} 项检查失败！")
+        sys.exit(1)
+    print("\n🎉 全部通过！")
+
+
+if __name__ == "__main__":
+    main()
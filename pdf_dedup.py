@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF页面去重
+功能：按内容哈希为页面及其引用的内容流、图片、字体等计算指纹，
+      字节完全相同的流只保留一份并改为共享引用，并可识别完全重复的页面和空白页
+依赖：无
+"""
+
+import re
+import hashlib
+
+# 可从页面树父节点继承的页面属性
+INHERITABLE_KEYS = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+# 计算指纹时忽略的键：/Parent 指回页面树，/Length 只描述流的长度
+SKIPPED_KEYS = ("/Parent",)
+SKIPPED_STREAM_KEYS = ("/Parent", "/Length")
+# 遍历时不展开的对象类型：只有被计算的页面本身会展开
+PAGE_NODE_TYPES = ("/Page", "/Pages")
+
+# 会在页面上留下痕迹的操作符：描边/填充路径、着色、绘制 XObject、显示文字、内联图片
+PAINT_OPERATOR_PATTERN = re.compile(
+    rb"(?:^|(?<=[\s()<>\[\]{}]))(?:f\*|B\*|b\*|sh|Do|Tj|TJ|BI|[SsfFBb'\"])(?=[\s()<>\[\]{}/%]|$)"
+)
+
+
+def is_blank_content(data):
+    """
+    判断解码后的页面内容流是否不含任何绘制操作
+
+    只做保守的词法判断：字符串中恰好出现操作符样式的文字时按非空白处理。
+
+    Args:
+        data (bytes): 解码后的内容流
+
+    Returns:
+        bool: True 表示页面上不会绘制任何东西
+    """
+    return PAINT_OPERATOR_PATTERN.search(data) is None
+
+
+def _digest(*parts):
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.digest()
+
+
+class PageDeduplicator:
+    """
+    基于后端文档对象访问接口的去重遍历
+
+    文档需提供以下方法（见 PDFDocument）：
+        _page_object(index)         页面字典
+        _object_id(obj)             间接引用的 (对象号, 代数)，直接对象返回 None
+        _resolve(obj)               解析间接引用
+        _raw_stream(obj)            流对象未解码的原始数据
+        _children(obj)              ("dict" | "array" | "stream", [(键, 值), ...])，标量返回 None
+        _replace(container, key, value)
+        _content_data(index)        解码后的页面内容流
+
+    用同一内容的流替换引用不改变页面的显示效果，因此遍历时可以直接改写。
+    """
+
+    def __init__(self, document):
+        self.document = document
+        self._fingerprints = {}     # 对象号 -> 指纹
+        self._canonical = {}        # 流指纹 -> 首次出现的引用
+        self._stream_sizes = {}     # 对象号 -> 原始数据长度
+        self.shared_streams = set()  # 被替换掉的重复流对象号
+
+    def page_fingerprint(self, index):
+        """
+        计算页面指纹，同时把页面引用的重复流替换为共享引用
+
+        继承自父节点的属性也计入指纹，其余页面树结构不计入。
+        """
+        document = self.document
+        page = document._page_object(index)
+        parts = [self._fingerprint(page)]
+
+        _, entries = document._children(document._resolve(page))
+        present = {str(key) for key, _ in entries}
+        parent = dict((str(key), value) for key, value in entries).get("/Parent")
+        seen = set()
+        while parent is not None and document._object_id(parent) not in seen:
+            seen.add(document._object_id(parent))
+            children = document._children(document._resolve(parent))
+            if children is None:
+                break
+            parent_entries = dict((str(key), value) for key, value in children[1])
+            for key in INHERITABLE_KEYS:
+                if key not in present and key in parent_entries:
+                    present.add(key)
+                    parts.append(key.encode() + self._fingerprint(parent_entries[key]))
+            parent = parent_entries.get("/Parent")
+        return _digest(*parts)
+
+    def is_blank(self, index):
+        """页面不含绘制操作且没有批注"""
+        document = self.document
+        _, entries = document._children(document._resolve(document._page_object(index)))
+        if any(str(key) == "/Annots" for key, _ in entries):
+            return False
+        return is_blank_content(document._content_data(index))
+
+    def stream_bytes(self, indices):
+        """统计指定页面可达的所有流的原始数据总长度（共享的流只计一次）"""
+        document = self.document
+        total = 0
+        visited = set()
+        pending = [(document._page_object(index), True) for index in indices]
+        while pending:
+            obj, is_root = pending.pop()
+            object_id = document._object_id(obj)
+            if object_id is not None:
+                if object_id in visited:
+                    continue
+                visited.add(object_id)
+                obj = document._resolve(obj)
+            children = document._children(obj)
+            if children is None:
+                continue
+            kind, entries = children
+            if not is_root and _is_page_node(entries):
+                # 链接等指向的其他页面（可能已被删除）不计入
+                continue
+            if kind == "stream" and object_id is not None:
+                if object_id not in self._stream_sizes:
+                    self._stream_sizes[object_id] = len(document._raw_stream(obj))
+                total += self._stream_sizes[object_id]
+            pending.extend((value, False) for key, value in entries
+                           if str(key) not in SKIPPED_KEYS)
+        return total
+
+    def _fingerprint(self, root):
+        """
+        计算对象指纹，同时把其中引用的重复流替换为共享引用
+
+        使用显式栈做后序遍历，链接注释串起的长页面链不会导致递归过深。
+        """
+        stack = []
+        on_path = set()
+        fingerprint = self._enter(root, stack, on_path)
+        while stack:
+            frame = stack[-1]
+            if fingerprint is not None:
+                # 上一步得到的是 frame 中前一个子对象的指纹
+                key, value = frame.entries[frame.position - 1]
+                frame.parts.append(str(key).encode())
+                frame.parts.append(fingerprint)
+                self._share(frame.obj, key, value, fingerprint)
+                fingerprint = None
+            if frame.position < len(frame.entries):
+                _, value = frame.entries[frame.position]
+                frame.position += 1
+                fingerprint = self._enter(value, stack, on_path)
+                continue
+            stack.pop()
+            fingerprint = _digest(*frame.parts)
+            if frame.object_id is not None:
+                on_path.discard(frame.object_id)
+                self._fingerprints[frame.object_id] = fingerprint
+        return fingerprint
+
+    def _enter(self, value, stack, on_path):
+        """
+        开始处理一个对象：能直接得出指纹时返回指纹，否则压栈并返回 None
+
+        其他页面和页面树节点（例如链接的目标页）只按对象号计入，不展开；
+        循环引用同样按对象号计入，因此只会让判断更保守。
+        """
+        document = self.document
+        object_id = document._object_id(value)
+        obj = value
+        if object_id is not None:
+            if object_id in self._fingerprints:
+                return self._fingerprints[object_id]
+            if object_id in on_path:
+                return _digest(b"ref", repr(object_id).encode())
+            obj = document._resolve(value)
+
+        children = document._children(obj)
+        if children is None:
+            fingerprint = _digest(b"value", f"{type(obj).__name__}:{obj!r}".encode())
+            if object_id is not None:
+                self._fingerprints[object_id] = fingerprint
+            return fingerprint
+
+        kind, entries = children
+        if stack and _is_page_node(entries):
+            return _digest(b"ref", repr(object_id).encode())
+
+        skipped = SKIPPED_STREAM_KEYS if kind == "stream" else SKIPPED_KEYS
+        parts = [kind.encode()]
+        if kind == "stream":
+            data = document._raw_stream(obj)
+            parts.append(data)
+            if object_id is not None:
+                self._stream_sizes[object_id] = len(data)
+        if kind != "array":
+            entries = sorted(entries, key=lambda entry: str(entry[0]))
+        entries = [(key, item) for key, item in entries if str(key) not in skipped]
+        stack.append(_Frame(object_id, obj, parts, entries))
+        if object_id is not None:
+            on_path.add(object_id)
+        return None
+
+    def _share(self, container, key, value, fingerprint):
+        """子对象是重复的流时改为引用首次出现的同内容流"""
+        document = self.document
+        object_id = document._object_id(value)
+        if object_id is not None and object_id in self._stream_sizes:
+            canonical = self._canonical.setdefault(fingerprint, value)
+            if document._object_id(canonical) != object_id:
+                document._replace(container, key, canonical)
+                self.shared_streams.add(object_id)
+
+
+class _Frame:
+    """_fingerprint 遍历栈中的一个容器对象"""
+    __slots__ = ("object_id", "obj", "parts", "entries", "position")
+
+    def __init__(self, object_id, obj, parts, entries):
+        self.object_id = object_id
+        self.obj = obj
+        self.parts = parts
+        self.entries = entries
+        self.position = 0
+
+
+def _is_page_node(entries):
+    """字典是否为页面 (/Page) 或页面树节点 (/Pages)"""
+    return any(str(key) == "/Type" and str(value) in PAGE_NODE_TYPES for key, value in entries)
+
+
+def add_dedup_arguments(parser):
+    """为命令行添加页面去重参数"""
+    parser.add_argument("--dedupe", action="store_true",
+                        help="相同内容的流（内容流、图片、字体）只写入一次")
+    parser.add_argument("--remove-duplicates", action="store_true",
+                        help="删除与前面某页完全相同的页面")
+    parser.add_argument("--remove-blank", action="store_true",
+                        help="删除不含任何绘制操作的空白页")
@@ -3,69 +3,123 @@
 """
 PDF页面删除工具
 功能：删除PDF文件中的指定页面
-依赖：pip install PyPDF2
+依赖：pip install PyPDF2 (可选：pip install pikepdf)
 """
 
 import os
 import sys
-import PyPDF2
+import argparse
+
+from pdf_backend import (
+    ON_ERROR_SKIP,
+    STDIN_PATH,
+    PDFPasswordError,
+    add_backend_arguments,
+    get_backend,
+    log_dedup_report,
+    log_page_errors,
+)
+from pdf_dedup import add_dedup_arguments
+from pdf_output import DEFAULT_BUFFER_SIZE, STDOUT_PATH, open_output
 
 class PDFDeleteTool:
-    def __init__(self):
-        """初始化PDF页面删除工具"""
+    def __init__(self, backend=None, buffer_size=DEFAULT_BUFFER_SIZE, fsync=False,
+                 log=print, progress=None):
+        """
+        初始化PDF页面删除工具
+        
+        Args:
+            backend (str): 处理后端名称，如 "pypdf2" 或 "pikepdf"
+            buffer_size (int): 输出文件的写缓冲区大小 (字节)
+            fsync (bool): 保存时是否 fsync，确保结果落盘后再替换目标文件
+            log (callable): 接收处理过程中的提示信息，默认直接打印；传 None 则不输出
+            progress (callable): 每处理完一页调用 progress(页号, 总页数)
+        """
         self.input_pdf_path = ""
         self.output_pdf_path = ""
+        self.backend = get_backend(backend)
+        self.password = None
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.log = log or (lambda message: None)
+        self.progress = progress
         
-    def delete_pages_from_pdf(self, input_path, output_path, pages_to_delete):
+    def delete_pages_from_pdf(self, input_path, output_path, pages_to_delete,
+                              password=None, robust=False, on_error=ON_ERROR_SKIP,
+                              dedupe=False, remove_duplicates=False, remove_blank=False):
         """
         从PDF中删除指定页面
         
         Args:
-            input_path (str): 输入PDF路径
-            output_path (str): 输出PDF路径
+            input_path (str): 输入PDF路径，"-" 表示标准输入，也可以是 bytes、memoryview 或二进制文件对象
+            output_path (str): 输出PDF路径，"-" 表示标准输出，也可以是已打开的二进制文件对象
             pages_to_delete (set): 要删除的页面号集合
+            password (str): 加密PDF的密码
+            robust (bool): 容错模式，修复损坏的交叉引用表，单页出错时不中断整个文档
+            on_error (str): 容错模式下单页出错的处理方式，"skip" 跳过该页，"passthrough" 原样保留
+            dedupe (bool): 相同内容的流只保留一份，改为共享引用
+            remove_duplicates (bool): 删除与前面某页完全相同的页面（隐含 dedupe）
+            remove_blank (bool): 删除不含任何绘制操作的空白页（隐含 dedupe）
+            
+        Returns:
+            dict | bool: 处理报告，包括总页数、单页错误列表、是否修复过交叉引用表和去重报告；
+                         要删除所有页面时返回 False
         """
         try:
             # 读取原始PDF
-            with open(input_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                total_pages = len(pdf_reader.pages)
-                print(f"正在处理PDF文件，共 {total_pages} 页...")
-                
-                kept_pages = 0
-                deleted_pages = 0
+            with self.backend.open(input_path, password, robust, on_error) as document:
+                total_pages = document.page_count
+                self.log(f"正在处理PDF文件，共 {total_pages} 页...")
                 
                 for page_num in range(1, total_pages + 1):
-                    page = pdf_reader.pages[page_num - 1]
-                    
                     if page_num in pages_to_delete:
-                        print(f"🗑️ 删除第 {page_num} 页")
-                        deleted_pages += 1
+                        document.delete_pages([page_num - 1])
+                        self.log(f"🗑️ 删除第 {page_num} 页")
                     else:
-                        pdf_writer.add_page(page)
-                        print(f"✅ 保留第 {page_num} 页")
-                        kept_pages += 1
+                        self.log(f"✅ 保留第 {page_num} 页")
+                    
+                    if self.progress:
+                        self.progress(page_num, total_pages)
                 
-                # 检查是否还有页面保留
-                if kept_pages == 0:
-                    print("❌ 错误：不能删除所有页面！")
+                # 检查是否还有页面保留（容错模式下已跳过的出错页面也不会保留）
+                if not list(document):
+                    self.log("❌ 错误：不能删除所有页面！")
                     return False
                 
-                # 保存处理后的PDF
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
+                # 页面去重
+                dedup = None
+                if dedupe or remove_duplicates or remove_blank:
+                    dedup = document.deduplicate(remove_duplicates, remove_blank)
+                
+                # 保存处理后的PDF；pikepdf 保存时会重新编号，先记录要保留的页面
+                kept = list(document)
+                with open_output(output_path, self.buffer_size, self.fsync) as output_file:
+                    document.save(output_file)
+                
+                # 统计时扣除保存过程中跳过的出错页面
+                skipped = {error["page"] - 1 for error in document.errors
+                           if error["action"] == ON_ERROR_SKIP}
+                kept_pages = sum(1 for index in kept if index not in skipped)
+                deleted_pages = total_pages - kept_pages
                     
-                print(f"\n📊 处理统计：")
-                print(f"原始页数: {total_pages}")
-                print(f"删除页数: {deleted_pages}")
-                print(f"保留页数: {kept_pages}")
-                print(f"✅ PDF页面删除完成！输出文件：{output_path}")
-                return True
+                self.log(f"\n📊 处理统计：")
+                self.log(f"原始页数: {total_pages}")
+                self.log(f"删除页数: {deleted_pages}")
+                self.log(f"保留页数: {kept_pages}")
+                self.log(f"✅ PDF页面删除完成！输出文件：{output_path}")
+                log_page_errors(document.errors, self.log)
+                if document.repaired:
+                    self.log("⚠️ 交叉引用表已损坏，已通过线性扫描修复")
+                log_dedup_report(dedup, self.log)
+                return {
+                    "total_pages": total_pages,
+                    "errors": document.errors,
+                    "repaired": document.repaired,
+                    "dedup": dedup,
+                }
                 
         except Exception as e:
-            print(f"❌ 处理PDF时出错：{e}")
+            self.log(f"❌ 处理PDF时出错：{e}")
             raise
     
     def parse_page_range(self, page_range, total_pages):
@@ -107,7 +161,7 @@ class PDFDeleteTool:
                         pages.update(range(end, start + 1))
                         
                 except ValueError:
-                    print(f"⚠️ 无效的页面范围: {part}")
+                    self.log(f"⚠️ 无效的页面范围: {part}")
                     continue
             else:
                 # 处理单个页面
@@ -116,9 +170,9 @@ class PDFDeleteTool:
                     if 1 <= page_num <= total_pages:
                         pages.add(page_num)
                     else:
-                        print(f"⚠️ 页面号超出范围: {page_num}")
+                        self.log(f"⚠️ 页面号超出范围: {page_num}")
                 except ValueError:
-                    print(f"⚠️ 无效的页面号: {part}")
+                    self.log(f"⚠️ 无效的页面号: {part}")
                     continue
         
         return pages
@@ -162,6 +216,16 @@ class PDFDeleteTool:
         
         return True
     
+    def open_document(self, input_path):
+        """打开PDF，已加密时提示输入密码"""
+        while True:
+            try:
+                return self.backend.open(input_path, self.password)
+            except PDFPasswordError:
+                if self.password is not None:
+                    print("❌ 密码错误，请重新输入！")
+                self.password = input("PDF已加密，请输入密码: ")
+    
     def run(self):
         """运行主程序"""
         print("=" * 60)
@@ -179,9 +243,8 @@ class PDFDeleteTool:
         
         # 显示PDF信息
         try:
-            with open(self.input_pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+            with self.open_document(self.input_pdf_path) as document:
+                total_pages = document.page_count
                 print(f"\n📄 PDF信息：共 {total_pages} 页")
                 
                 # 显示页面列表
@@ -247,7 +310,8 @@ class PDFDeleteTool:
                 success = self.delete_pages_from_pdf(
                     self.input_pdf_path, 
                     self.output_pdf_path, 
-                    pages_to_delete
+                    pages_to_delete,
+                    self.password
                 )
                 return success
             except Exception as e:
@@ -257,6 +321,50 @@ class PDFDeleteTool:
             print("❌ 已取消处理")
             return False
 
+def cli(argv):
+    """
+    命令行模式，输入输出可用 "-" 表示标准输入/标准输出，便于管道串联
+    
+    Returns:
+        bool: 是否成功
+    """
+    parser = argparse.ArgumentParser(description="PDF页面删除工具")
+    parser.add_argument("input", help='输入PDF，"-" 表示标准输入')
+    parser.add_argument("output", help='输出PDF，"-" 表示标准输出')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--pages", help="要删除的页面，如 1,3-5")
+    mode.add_argument("--keep", help="要保留的页面（删除其他），如 1,3-5")
+    add_backend_arguments(parser)
+    add_dedup_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    # 结果写到标准输出时，提示信息改写到标准错误
+    if args.output == STDOUT_PATH:
+        log = lambda message: print(message, file=sys.stderr)
+    else:
+        log = print
+    
+    tool = PDFDeleteTool(args.backend, log=log)
+    try:
+        # 页码需要总页数才能解析，先读入内存避免标准输入被读取两次
+        data = sys.stdin.buffer.read() if args.input == STDIN_PATH else args.input
+        with tool.backend.open(data, args.password, args.robust) as document:
+            total_pages = document.page_count
+        if args.pages:
+            pages_to_delete = tool.parse_page_range(args.pages, total_pages)
+        else:
+            pages_to_keep = tool.parse_page_range(args.keep, total_pages)
+            pages_to_delete = set(range(1, total_pages + 1)) - pages_to_keep
+        report = tool.delete_pages_from_pdf(
+            data, args.output, pages_to_delete,
+            args.password, args.robust, args.on_error,
+            args.dedupe, args.remove_duplicates, args.remove_blank
+        )
+    except Exception as e:
+        log(f"❌ 处理失败：{e}")
+        return False
+    return bool(report)
+
 def main():
     """主函数"""
     # 检查依赖
@@ -268,6 +376,10 @@ def main():
         print("pip install PyPDF2")
         sys.exit(1)
     
+    # 带参数时使用命令行模式
+    if len(sys.argv) > 1:
+        sys.exit(0 if cli(sys.argv[1:]) else 1)
+    
     # 创建工具实例并运行
     tool = PDFDeleteTool()
     success = tool.run()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF输出层
+功能：先写入目标目录下的临时文件（大缓冲区），可选 fsync，完成后原子重命名到目标路径；
+      也支持直接写到标准输出或已打开的管道/文件对象，便于流水线串联
+依赖：无
+"""
+
+import os
+import sys
+import tempfile
+import contextlib
+
+# 默认写缓冲区大小，网络存储上小块写入代价很高
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+# 以此作为输出路径时写到标准输出
+STDOUT_PATH = "-"
+
+
+class _PositionWriter:
+    """
+    为管道等不可 seek 的输出补充 tell()
+
+    PDF写出时只需要知道当前写到的位置来记录交叉引用偏移，不需要回退，
+    因此按写入字节数计数即可实现真正的流式输出。
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._position = 0
+
+    def write(self, data):
+        written = self._stream.write(data)
+        self._position += len(data)
+        return written
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        self._stream.flush()
+
+
+def _seekable(stream):
+    seekable = getattr(stream, "seekable", None)
+    try:
+        return bool(seekable and seekable())
+    except (OSError, ValueError):
+        return False
+
+
+def _read_umask():
+    """
+    读取进程的 umask
+
+    os.umask 只能"设置并返回旧值"，临时改动期间其他线程新建的文件权限会出错，
+    因此优先从 /proc 读取，只在模块导入时才回退到设置再恢复的方式。
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def _default_mode(output_path):
+    """新文件的权限与直接 open() 创建时一致；覆盖已有文件时沿用原权限"""
+    try:
+        return os.stat(output_path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def _fsync_directory(directory):
+    """同步目录项，保证重命名本身落盘（仅 POSIX）"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def open_output(output, buffer_size=DEFAULT_BUFFER_SIZE, fsync=False):
+    """
+    打开输出目标
+
+    写文件路径时，内容先写入同目录下的临时文件，只有全部写完才原子重命名为目标文件；
+    中途出错或进程崩溃都不会留下截断的PDF。
+
+    Args:
+        output (str | file): 输出路径，"-" 表示标准输出，也可以是已打开的二进制文件对象
+        buffer_size (int): 写缓冲区大小 (字节)
+        fsync (bool): 重命名前是否 fsync 文件和目录
+
+    Yields:
+        file: 可写的二进制文件对象
+    """
+    if hasattr(output, "write"):
+        # 管道、套接字等由调用方管理生命周期
+        yield output if _seekable(output) else _PositionWriter(output)
+        output.flush()
+        return
+
+    if output == STDOUT_PATH:
+        sys.stdout.flush()
+        with open(sys.stdout.fileno(), 'wb', buffering=buffer_size, closefd=False) as stream:
+            yield stream if _seekable(stream) else _PositionWriter(stream)
+        return
+
+    directory = os.path.dirname(os.path.abspath(output))
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(output)}.", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, 'wb', buffering=buffer_size) as stream:
+            yield stream
+            stream.flush()
+            if fsync:
+                os.fsync(stream.fileno())
+        os.chmod(temp_path, _default_mode(output))
+        os.replace(temp_path, output)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+    if fsync:
+        _fsync_directory(directory)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF交叉引用表检测与修复
+功能：快速检测损坏的 xref 表，并通过线性扫描 "N G obj" 重建交叉引用表
+依赖：无
+"""
+
+import re
+
+# startxref 通常位于文件末尾，只需读取最后一小段即可定位
+TAIL_SIZE = 2048
+# 抽样检查的 xref 条目数
+SAMPLE_ENTRIES = 8
+
+OBJECT_PATTERN = re.compile(rb"(?<![0-9])(\d{1,10})\s+(\d{1,5})\s+obj\b")
+STARTXREF_PATTERN = re.compile(rb"startxref\s+(\d+)")
+XREF_SUBSECTION_PATTERN = re.compile(rb"xref\s+(\d+)\s+(\d+)\s+")
+TRAILER_PATTERN = re.compile(rb"trailer\s*<<")
+REFERENCE_PATTERN = rb"\s+(\d+)\s+(\d+)\s+R"
+CATALOG_PATTERN = re.compile(rb"/Type\s*/Catalog\b")
+
+
+def check_xref(file):
+    """
+    快速检测交叉引用表是否可用：只读取文件末尾和少量抽样偏移
+
+    Args:
+        file: 以二进制模式打开的可 seek 文件对象
+
+    Returns:
+        bool: True 表示 startxref 指向有效的 xref 表或 xref 流
+    """
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(max(0, size - TAIL_SIZE))
+    tail = file.read()
+
+    matches = list(STARTXREF_PATTERN.finditer(tail))
+    if not matches:
+        return False
+    offset = int(matches[-1].group(1))
+    if offset <= 0 or offset >= size:
+        return False
+
+    file.seek(offset)
+    head = file.read(64)
+    if head.startswith(b"xref"):
+        subsection = XREF_SUBSECTION_PATTERN.match(head)
+        if not subsection:
+            return False
+        return _check_xref_entries(file, offset + subsection.end(),
+                                   int(subsection.group(1)), int(subsection.group(2)), size)
+    # PDF 1.5 及以上可能使用 xref 流
+    return OBJECT_PATTERN.match(head) is not None
+
+
+def _check_xref_entries(file, entries_offset, first, count, size):
+    """抽样检查 xref 表中 "n" 条目指向的位置是否真的是对应的对象"""
+    file.seek(entries_offset)
+    step = max(1, count // SAMPLE_ENTRIES)
+    for number in range(0, count, step):
+        file.seek(entries_offset + number * 20)
+        entry = file.read(20)
+        if len(entry) < 18 or entry[17:18] != b"n":
+            continue
+        try:
+            offset = int(entry[:10])
+        except ValueError:
+            return False
+        if offset >= size:
+            return False
+        file.seek(offset)
+        match = OBJECT_PATTERN.match(file.read(32).lstrip())
+        if not match or int(match.group(1)) != first + number:
+            return False
+    return True
+
+
+def _trailer_reference(trailer, key):
+    match = re.search(rb"/" + key + REFERENCE_PATTERN, trailer)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    return None
+
+
+def rebuild_xref(data):
+    """
+    线性扫描全部 "N G obj"，在文件末尾追加一个新的 xref 表和 trailer
+
+    同一对象出现多次时以最后一次为准（与增量更新语义一致）。
+    压缩在对象流 (ObjStm) 中的对象无法通过扫描找到。
+
+    Args:
+        data (bytes): 原始PDF数据
+
+    Returns:
+        bytes: 修复后的PDF数据
+
+    Raises:
+        ValueError: 找不到任何对象或文档目录 (Catalog)
+    """
+    offsets = {}
+    for match in OBJECT_PATTERN.finditer(data):
+        offsets[int(match.group(1))] = (match.start(), int(match.group(2)))
+    if not offsets:
+        raise ValueError("未找到任何PDF对象，无法修复")
+
+    trailer = b""
+    trailers = list(TRAILER_PATTERN.finditer(data))
+    if trailers:
+        trailer = data[trailers[-1].start():trailers[-1].start() + 1024]
+
+    root = _trailer_reference(trailer, b"Root")
+    if root is None or root[0] not in offsets:
+        root = None
+        for number, (offset, generation) in sorted(offsets.items()):
+            end = data.find(b"endobj", offset)
+            if CATALOG_PATTERN.search(data, offset, end if end != -1 else len(data)):
+                root = (number, generation)
+        if root is None:
+            raise ValueError("未找到文档目录 (Catalog)，无法修复")
+
+    size = max(offsets) + 1
+    lines = [b"xref", b"0 %d" % size, b"0000000000 65535 f\r"]
+    for number in range(1, size):
+        if number in offsets:
+            offset, generation = offsets[number]
+            lines.append(b"%010d %05d n\r" % (offset, generation))
+        else:
+            lines.append(b"0000000000 00000 f\r")
+
+    entries = [b"/Size %d" % size, b"/Root %d %d R" % root]
+    for key in (b"Info", b"Encrypt"):
+        reference = _trailer_reference(trailer, key)
+        if reference and reference[0] in offsets:
+            entries.append(b"/" + key + b" %d %d R" % reference)
+    document_id = re.search(rb"/ID\s*(\[[^\]]*\])", trailer)
+    if document_id:
+        entries.append(b"/ID " + document_id.group(1))
+
+    body = data if data.endswith(b"\n") else data + b"\n"
+    xref_offset = len(body)
+    return (body + b"\n".join(lines) + b"\ntrailer\n<< " + b" ".join(entries)
+            + b" >>\nstartxref\n%d\n%%%%EOF\n" % xref_offset)
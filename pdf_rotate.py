@@ -3,61 +3,114 @@
 """
 PDF旋转工具
 功能：旋转PDF文件的页面
-依赖：pip install PyPDF2
+依赖：pip install PyPDF2 (可选：pip install pikepdf)
 """
 
 import os
 import sys
-import PyPDF2
+import argparse
+
+from pdf_backend import (
+    ON_ERROR_SKIP,
+    PDFPasswordError,
+    add_backend_arguments,
+    get_backend,
+    log_dedup_report,
+    log_page_errors,
+)
+from pdf_dedup import add_dedup_arguments
+from pdf_output import DEFAULT_BUFFER_SIZE, STDOUT_PATH, open_output
 
 class PDFRotateTool:
-    def __init__(self):
-        """初始化PDF旋转工具"""
+    def __init__(self, backend=None, buffer_size=DEFAULT_BUFFER_SIZE, fsync=False,
+                 log=print, progress=None):
+        """
+        初始化PDF旋转工具
+        
+        Args:
+            backend (str): 处理后端名称，如 "pypdf2" 或 "pikepdf"
+            buffer_size (int): 输出文件的写缓冲区大小 (字节)
+            fsync (bool): 保存时是否 fsync，确保结果落盘后再替换目标文件
+            log (callable): 接收处理过程中的提示信息，默认直接打印；传 None 则不输出
+            progress (callable): 每处理完一页调用 progress(页号, 总页数)
+        """
         self.input_pdf_path = ""
         self.output_pdf_path = ""
+        self.backend = get_backend(backend)
+        self.password = None
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.log = log or (lambda message: None)
+        self.progress = progress
         
-    def rotate_pdf(self, input_path, output_path, rotation_angle, page_range=None):
+    def rotate_pdf(self, input_path, output_path, rotation_angle, page_range=None,
+                   password=None, robust=False, on_error=ON_ERROR_SKIP,
+                   dedupe=False, remove_duplicates=False, remove_blank=False):
         """
         旋转PDF页面
         
         Args:
-            input_path (str): 输入PDF路径
-            output_path (str): 输出PDF路径
+            input_path (str): 输入PDF路径，"-" 表示标准输入，也可以是 bytes、memoryview 或二进制文件对象
+            output_path (str): 输出PDF路径，"-" 表示标准输出，也可以是已打开的二进制文件对象
             rotation_angle (int): 旋转角度 (90, 180, 270, -90, -180, -270)
             page_range (str): 页面范围，如 "1-3" 或 "1,3,5" 或 "all"
+            password (str): 加密PDF的密码
+            robust (bool): 容错模式，修复损坏的交叉引用表，单页出错时不中断整个文档
+            on_error (str): 容错模式下单页出错的处理方式，"skip" 跳过该页，"passthrough" 原样保留
+            dedupe (bool): 相同内容的流只保留一份，改为共享引用
+            remove_duplicates (bool): 删除与前面某页完全相同的页面（隐含 dedupe）
+            remove_blank (bool): 删除不含任何绘制操作的空白页（隐含 dedupe）
+            
+        Returns:
+            dict: 处理报告，包括总页数、单页错误列表、是否修复过交叉引用表和去重报告
         """
         try:
             # 读取原始PDF
-            with open(input_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                pdf_writer = PyPDF2.PdfWriter()
-                
-                total_pages = len(pdf_reader.pages)
-                print(f"正在处理PDF文件，共 {total_pages} 页...")
+            with self.backend.open(input_path, password, robust, on_error) as document:
+                total_pages = document.page_count
+                self.log(f"正在处理PDF文件，共 {total_pages} 页...")
                 
                 # 解析页面范围
                 pages_to_rotate = self.parse_page_range(page_range, total_pages)
                 
                 for page_num in range(1, total_pages + 1):
-                    page = pdf_reader.pages[page_num - 1]
-                    
                     if page_num in pages_to_rotate:
                         # 旋转指定页面
-                        page.rotate(rotation_angle)
-                        print(f"旋转第 {page_num} 页 {rotation_angle}°")
+                        try:
+                            document.rotate_page(page_num - 1, rotation_angle)
+                            self.log(f"旋转第 {page_num} 页 {rotation_angle}°")
+                        except Exception as e:
+                            document.page_failed(page_num - 1, e)
+                            self.log(f"⚠️ 第 {page_num} 页旋转失败：{e}")
                     else:
-                        print(f"保持第 {page_num} 页不变")
+                        self.log(f"保持第 {page_num} 页不变")
                     
-                    pdf_writer.add_page(page)
+                    if self.progress:
+                        self.progress(page_num, total_pages)
+                
+                # 页面去重
+                dedup = None
+                if dedupe or remove_duplicates or remove_blank:
+                    dedup = document.deduplicate(remove_duplicates, remove_blank)
                 
                 # 保存旋转后的PDF
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
+                with open_output(output_path, self.buffer_size, self.fsync) as output_file:
+                    document.save(output_file)
                     
-                print(f"✅ PDF旋转完成！输出文件：{output_path}")
+                self.log(f"✅ PDF旋转完成！输出文件：{output_path}")
+                log_page_errors(document.errors, self.log)
+                if document.repaired:
+                    self.log("⚠️ 交叉引用表已损坏，已通过线性扫描修复")
+                log_dedup_report(dedup, self.log)
+                return {
+                    "total_pages": total_pages,
+                    "errors": document.errors,
+                    "repaired": document.repaired,
+                    "dedup": dedup,
+                }
                 
         except Exception as e:
-            print(f"❌ 处理PDF时出错：{e}")
+            self.log(f"❌ 处理PDF时出错：{e}")
             raise
     
     def parse_page_range(self, page_range, total_pages):
@@ -99,7 +152,7 @@ class PDFRotateTool:
                         pages.update(range(end, start + 1))
                         
                 except ValueError:
-                    print(f"⚠️ 无效的页面范围: {part}")
+                    self.log(f"⚠️ 无效的页面范围: {part}")
                     continue
             else:
                 # 处理单个页面
@@ -108,13 +161,23 @@ class PDFRotateTool:
                     if 1 <= page_num <= total_pages:
                         pages.add(page_num)
                     else:
-                        print(f"⚠️ 页面号超出范围: {page_num}")
+                        self.log(f"⚠️ 页面号超出范围: {page_num}")
                 except ValueError:
-                    print(f"⚠️ 无效的页面号: {part}")
+                    self.log(f"⚠️ 无效的页面号: {part}")
                     continue
         
         return pages
     
+    def open_document(self, input_path):
+        """打开PDF，已加密时提示输入密码"""
+        while True:
+            try:
+                return self.backend.open(input_path, self.password)
+            except PDFPasswordError:
+                if self.password is not None:
+                    print("❌ 密码错误，请重新输入！")
+                self.password = input("PDF已加密，请输入密码: ")
+    
     def run(self):
         """运行主程序"""
         print("=" * 60)
@@ -132,9 +195,8 @@ class PDFRotateTool:
         
         # 显示PDF信息
         try:
-            with open(self.input_pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+            with self.open_document(self.input_pdf_path) as document:
+                total_pages = document.page_count
                 print(f"\n📄 PDF信息：共 {total_pages} 页")
         except Exception as e:
             print(f"⚠️ 无法读取PDF信息: {e}")
@@ -216,7 +278,8 @@ class PDFRotateTool:
                     self.input_pdf_path, 
                     self.output_pdf_path, 
                     rotation_angle,
-                    page_range
+                    page_range,
+                    self.password
                 )
             except Exception as e:
                 print(f"❌ 处理失败：{e}")
@@ -227,6 +290,38 @@ class PDFRotateTool:
         
         return True
 
+def cli(argv):
+    """
+    命令行模式，输入输出可用 "-" 表示标准输入/标准输出，便于管道串联
+    
+    Returns:
+        bool: 是否成功
+    """
+    parser = argparse.ArgumentParser(description="PDF旋转工具")
+    parser.add_argument("input", help='输入PDF，"-" 表示标准输入')
+    parser.add_argument("output", help='输出PDF，"-" 表示标准输出')
+    parser.add_argument("--angle", type=int, default=90, help="旋转角度，正数顺时针")
+    parser.add_argument("--pages", default="all", help="页面范围，如 1,3-5 (默认全部)")
+    add_backend_arguments(parser)
+    add_dedup_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    # 结果写到标准输出时，提示信息改写到标准错误
+    if args.output == STDOUT_PATH:
+        log = lambda message: print(message, file=sys.stderr)
+    else:
+        log = print
+    
+    try:
+        PDFRotateTool(args.backend, log=log).rotate_pdf(
+            args.input, args.output, args.angle % 360, args.pages,
+            args.password, args.robust, args.on_error,
+            args.dedupe, args.remove_duplicates, args.remove_blank
+        )
+    except Exception:
+        return False
+    return True
+
 def main():
     """主函数"""
     # 检查依赖
@@ -238,6 +333,10 @@ def main():
         print("pip install PyPDF2")
         sys.exit(1)
     
+    # 带参数时使用命令行模式
+    if len(sys.argv) > 1:
+        sys.exit(0 if cli(sys.argv[1:]) else 1)
+    
     # 创建工具实例并运行
     tool = PDFRotateTool()
     success = tool.run()
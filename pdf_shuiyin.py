@@ -3,26 +3,51 @@
 """
 PDF水印添加工具
 功能：为PDF文件的每一页添加铺满的水印
-依赖：pip install reportlab PyPDF2
+依赖：pip install reportlab PyPDF2 (可选：pip install pikepdf)
 """
 
 import os
 import sys
+import argparse
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
-import PyPDF2
 import io
 import math
 
+from pdf_backend import (
+    ON_ERROR_SKIP,
+    PDFPasswordError,
+    add_backend_arguments,
+    get_backend,
+    log_page_errors,
+)
+from pdf_output import DEFAULT_BUFFER_SIZE, STDOUT_PATH, open_output
+
 class PDFWatermarkTool:
-    def __init__(self):
-        """初始化PDF水印工具"""
+    def __init__(self, backend=None, buffer_size=DEFAULT_BUFFER_SIZE, fsync=False,
+                 log=print, progress=None):
+        """
+        初始化PDF水印工具
+        
+        Args:
+            backend (str): 处理后端名称，如 "pypdf2" 或 "pikepdf"
+            buffer_size (int): 输出文件的写缓冲区大小 (字节)
+            fsync (bool): 保存时是否 fsync，确保结果落盘后再替换目标文件
+            log (callable): 接收处理过程中的提示信息，默认直接打印；传 None 则不输出
+            progress (callable): 每处理完一页调用 progress(页号, 总页数)
+        """
         self.watermark_text = ""
         self.input_pdf_path = ""
         self.output_pdf_path = ""
+        self.backend = get_backend(backend)
+        self.password = None
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self.log = log or (lambda message: None)
+        self.progress = progress
         
     def create_watermark_pdf(self, text, page_width, page_height, opacity=0.3, font_size=50):
         """
@@ -74,18 +99,18 @@ class PDFWatermarkTool:
                         pdfmetrics.registerFont(TTFont('ChineseFont', font_path))
                         can.setFont('ChineseFont', font_size)
                         font_registered = True
-                        print(f"✅ 使用字体: {font_path}")
+                        self.log(f"✅ 使用字体: {font_path}")
                         break
                     except Exception as font_error:
-                        print(f"⚠️ 字体 {font_path} 加载失败: {font_error}")
+                        self.log(f"⚠️ 字体 {font_path} 加载失败: {font_error}")
                         continue
             
             if not font_registered:
-                print("⚠️ 未找到支持中文的字体，使用默认字体（可能无法显示中文）")
+                self.log("⚠️ 未找到支持中文的字体，使用默认字体（可能无法显示中文）")
                 can.setFont('Helvetica', font_size)
                 
         except Exception as e:
-            print(f"❌ 字体设置失败，使用默认字体: {e}")
+            self.log(f"❌ 字体设置失败，使用默认字体: {e}")
             can.setFont('Helvetica', font_size)
         
         # 计算文字尺寸
@@ -97,9 +122,9 @@ class PDFWatermarkTool:
         if test_char in text:
             test_width = can.stringWidth(test_char, can._fontname, font_size)
             if test_width == 0:
-                print("⚠️ 警告：当前字体可能无法正确显示中文字符")
+                self.log("⚠️ 警告：当前字体可能无法正确显示中文字符")
             else:
-                print("✅ 中文字符显示测试通过")
+                self.log("✅ 中文字符显示测试通过")
         
         # 计算需要多少行和列来铺满页面
         diagonal_length = math.sqrt(page_width**2 + page_height**2)
@@ -135,56 +160,85 @@ class PDFWatermarkTool:
         packet.seek(0)
         return packet.getvalue()
     
-    def add_watermark_to_pdf(self, input_path, output_path, watermark_text, opacity=0.3, font_size=50):
+    def add_watermark_to_pdf(self, input_path, output_path, watermark_text, opacity=0.3, font_size=50,
+                             password=None, robust=False, on_error=ON_ERROR_SKIP):
         """
         为PDF添加水印
         
         Args:
-            input_path (str): 输入PDF路径
-            output_path (str): 输出PDF路径
+            input_path (str): 输入PDF路径，"-" 表示标准输入，也可以是 bytes、memoryview 或二进制文件对象
+            output_path (str): 输出PDF路径，"-" 表示标准输出，也可以是已打开的二进制文件对象
             watermark_text (str): 水印文字
             opacity (float): 透明度
             font_size (int): 字体大小
+            password (str): 加密PDF的密码
+            robust (bool): 容错模式，修复损坏的交叉引用表，单页出错时不中断整个文档
+            on_error (str): 容错模式下单页出错的处理方式，"skip" 跳过该页，"passthrough" 原样保留
+            
+        Returns:
+            dict: 处理报告，包括总页数、单页错误列表和是否修复过交叉引用表
         """
         try:
             # 读取原始PDF
-            with open(input_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                pdf_writer = PyPDF2.PdfWriter()
+            with self.backend.open(input_path, password, robust, on_error) as document:
+                total_pages = document.page_count
+                self.log(f"正在处理PDF文件，共 {total_pages} 页...")
                 
-                total_pages = len(pdf_reader.pages)
-                print(f"正在处理PDF文件，共 {total_pages} 页...")
+                # 相同尺寸的页面共用同一份水印
+                watermark_cache = {}
                 
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    print(f"处理第 {page_num}/{total_pages} 页...")
-                    
-                    # 获取页面尺寸
-                    page_width = float(page.mediabox.width)
-                    page_height = float(page.mediabox.height)
-                    
-                    # 创建该页面的水印
-                    watermark_bytes = self.create_watermark_pdf(
-                        watermark_text, page_width, page_height, opacity, font_size
-                    )
+                for page_num in range(1, total_pages + 1):
+                    self.log(f"处理第 {page_num}/{total_pages} 页...")
                     
-                    # 读取水印PDF
-                    watermark_pdf = PyPDF2.PdfReader(io.BytesIO(watermark_bytes))
-                    watermark_page = watermark_pdf.pages[0]
+                    try:
+                        # 获取页面尺寸
+                        page_width, page_height = document.page_size(page_num - 1)
+                        
+                        # 创建该页面的水印
+                        watermark_bytes = watermark_cache.get((page_width, page_height))
+                        if watermark_bytes is None:
+                            watermark_bytes = self.create_watermark_pdf(
+                                watermark_text, page_width, page_height, opacity, font_size
+                            )
+                            watermark_cache[(page_width, page_height)] = watermark_bytes
+                        
+                        # 将水印应用到原页面
+                        document.overlay_page(page_num - 1, watermark_bytes)
+                    except Exception as e:
+                        document.page_failed(page_num - 1, e)
+                        self.log(f"⚠️ 第 {page_num} 页添加水印失败：{e}")
                     
-                    # 将水印应用到原页面
-                    page.merge_page(watermark_page)
-                    pdf_writer.add_page(page)
+                    if self.progress:
+                        self.progress(page_num, total_pages)
                 
                 # 保存带水印的PDF
-                with open(output_path, 'wb') as output_file:
-                    pdf_writer.write(output_file)
+                with open_output(output_path, self.buffer_size, self.fsync) as output_file:
+                    document.save(output_file)
                     
-                print(f"✅ 水印添加完成！输出文件：{output_path}")
+                self.log(f"✅ 水印添加完成！输出文件：{output_path}")
+                log_page_errors(document.errors, self.log)
+                if document.repaired:
+                    self.log("⚠️ 交叉引用表已损坏，已通过线性扫描修复")
+                return {
+                    "total_pages": total_pages,
+                    "errors": document.errors,
+                    "repaired": document.repaired,
+                }
                 
         except Exception as e:
-            print(f"❌ 处理PDF时出错：{e}")
+            self.log(f"❌ 处理PDF时出错：{e}")
             raise
     
+    def open_document(self, input_path):
+        """打开PDF，已加密时提示输入密码"""
+        while True:
+            try:
+                return self.backend.open(input_path, self.password)
+            except PDFPasswordError:
+                if self.password is not None:
+                    print("❌ 密码错误，请重新输入！")
+                self.password = input("PDF已加密，请输入密码: ")
+    
     def run(self):
         """运行主程序"""
         print("=" * 60)
@@ -200,6 +254,13 @@ class PDFWatermarkTool:
             else:
                 print("❌ 文件不存在或不是PDF文件，请重新输入！")
         
+        # 加密文件需要先输入密码
+        try:
+            with self.open_document(self.input_pdf_path):
+                pass
+        except Exception as e:
+            print(f"⚠️ 无法读取PDF信息: {e}")
+        
         # 获取水印内容
         while True:
             watermark_text = input("请输入水印内容: ").strip()
@@ -250,7 +311,8 @@ class PDFWatermarkTool:
                     self.output_pdf_path, 
                     self.watermark_text,
                     opacity,
-                    font_size
+                    font_size,
+                    self.password
                 )
             except Exception as e:
                 print(f"❌ 处理失败：{e}")
@@ -261,6 +323,38 @@ class PDFWatermarkTool:
         
         return True
 
+def cli(argv):
+    """
+    命令行模式，输入输出可用 "-" 表示标准输入/标准输出，便于管道串联
+    
+    Returns:
+        bool: 是否成功
+    """
+    parser = argparse.ArgumentParser(description="PDF水印添加工具")
+    parser.add_argument("input", help='输入PDF，"-" 表示标准输入')
+    parser.add_argument("output", help='输出PDF，"-" 表示标准输出')
+    parser.add_argument("--text", required=True, help="水印内容")
+    parser.add_argument("--opacity", type=float, default=0.3, help="透明度 (0.1-1.0)")
+    parser.add_argument("--font-size", type=int, default=50, help="字体大小 (20-100)")
+    add_backend_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    # 结果写到标准输出时，提示信息改写到标准错误
+    if args.output == STDOUT_PATH:
+        log = lambda message: print(message, file=sys.stderr)
+    else:
+        log = print
+    
+    try:
+        PDFWatermarkTool(args.backend, log=log).add_watermark_to_pdf(
+            args.input, args.output, args.text,
+            max(0.1, min(1.0, args.opacity)), max(20, min(100, args.font_size)),
+            args.password, args.robust, args.on_error
+        )
+    except Exception:
+        return False
+    return True
+
 def main():
     """主函数"""
     # 检查依赖
@@ -273,6 +367,10 @@ def main():
         print("pip install reportlab PyPDF2")
         sys.exit(1)
     
+    # 带参数时使用命令行模式
+    if len(sys.argv) > 1:
+        sys.exit(0 if cli(sys.argv[1:]) else 1)
+    
     # 创建工具实例并运行
     tool = PDFWatermarkTool()
     success = tool.run()